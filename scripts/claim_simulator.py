@@ -0,0 +1,330 @@
+import heapq
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dotenv import dotenv_values
+from eth_utils import keccak
+from scripts.merkle_tree import MerkleTree, leaf_hash
+
+'''
+### TLDR:
+Distribution day capacity simulator - how many claimTokens() fit in a block, and how long claimants wait.
+
+Deploys GTC, Timelock & TokenDistributor on a local ganache chain, then replays a launch day burst:
+    - claimants arrive along an arrival curve (uniform / decay / burst), each with their own fresh account
+    - each claim is signed by a local stand-in for the ESMS (same EIP712 Claim digest, same signer check),
+      modelled as SIGNER_WORKERS workers taking SIGN_SECONDS per claim, so requests queue when it's busy
+    - the claim is sent SUBMIT_DELAY seconds after signing, with a random delegate (self, a popular steward
+      or a fresh address) so delegateOnDist() writes a realistic mix of new and existing checkpoints
+    - DUPLICATE_RATE of claimants send their claim twice (double click / impatient retry)
+    - the chain runs with automine off: one block every BLOCK_TIME seconds of simulated time,
+      packed by ganache up to the block gas limit, anything left over waits for the next block
+
+Claimants are drawn at random from a TREE_LEAVES leaf tree, so proof depth follows the tree size
+(and varies at the ragged end of the tree) the same way it does for the real distribution.
+
+Reports time-to-inclusion percentiles (from arrival and from submission), claims & gas per block,
+blocks filled, signer queueing and the duplicate-claim revert rate.
+
+Run against a ganache (v7) network with the block gas limit you want to model, e.g.
+`brownie networks add Development claim-sim cmd=ganache-cli host=http://127.0.0.1 port=8545 gas_limit=30000000 accounts=10 mnemonic=brownie`
+`brownie run claim_simulator --network claim-sim`
+
+Settings are read from the file in CLAIM_SIM_ENV (default .claim-sim-env), see .sample-claim-sim-env -
+anything missing falls back to DEFAULTS below.
+'''
+
+DEFAULTS = {
+    'CLAIMANTS': 20000,
+    'TREE_LEAVES': 0, # 0 for a tree the size of CLAIMANTS
+    'ARRIVAL_CURVE': 'decay',
+    'ARRIVAL_WINDOW': 3600,
+    'DECAY_HALF_LIFE': 600,
+    'BURST_SHARE': 0.5,
+    'BLOCK_TIME': 13,
+    'BLOCK_GAS_LIMIT': 30000000,
+    'SIGNER_WORKERS': 4,
+    'SIGN_SECONDS': 0.05,
+    'SUBMIT_DELAY': 5,
+    'DUPLICATE_RATE': 0.02,
+    'DUPLICATE_DELAY': 15,
+    'STEWARDS': 50,
+    'SELF_DELEGATE_RATE': 0.3,
+    'GAS_PRICE_GWEI': 1,
+    'MAX_BLOCKS': 5000,
+    'SEED': 1,
+    'REPORT_FILE': '',
+}
+
+CLAIM_TYPEHASH = keccak(text='Claim(uint32 user_id,address user_address,uint256 user_amount,address delegate_address,bytes32 leaf)')
+DOMAIN_TYPEHASH = keccak(text='EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)')
+GAS_HEADROOM = 1.25 # wallets send with some room over the estimate, and ganache packs blocks by gas limit
+
+def load_brownie():
+    '''brownie is only imported for a run, the settings, digest & queueing helpers work without it'''
+    global GTC, TokenDistributor, Timelock, accounts, web3, chain, Wei
+    from brownie import GTC, TokenDistributor, Timelock, accounts, web3, chain, Wei
+
+def load_settings(path):
+    settings = dict(DEFAULTS)
+    values = dotenv_values(path) if os.path.exists(path) else {}
+    for key, default in DEFAULTS.items():
+        if key in values:
+            settings[key] = type(default)(values[key])
+    if settings['ARRIVAL_CURVE'] not in ('uniform', 'decay', 'burst'):
+        raise ValueError(f'ARRIVAL_CURVE must be uniform, decay or burst - got {settings["ARRIVAL_CURVE"]}')
+    settings['TREE_LEAVES'] = max(settings['TREE_LEAVES'], settings['CLAIMANTS'])
+    return settings
+
+def _word(value):
+    return int(value).to_bytes(32, 'big')
+
+def _address_word(address):
+    return bytes(12) + bytes.fromhex(address[2:])
+
+def domain_separator(verifying_contract):
+    '''TokenDistributor builds its DOMAIN_SEPARATOR with chainId 1, whatever chain it's deployed on'''
+    return keccak(DOMAIN_TYPEHASH + keccak(text='GTC') + keccak(text='1.0.0') + _word(1) + _address_word(verifying_contract))
+
+def claim_digest(domain, user_id, user_address, user_amount, delegate_address, leaf):
+    '''same digest claimTokens() rebuilds and compares to eth_signed_message_hash_hex'''
+    hashed_claim = keccak(CLAIM_TYPEHASH + _word(user_id) + _address_word(user_address) + _word(user_amount) + _address_word(delegate_address) + leaf)
+    return keccak(b'\x19\x01' + domain + hashed_claim)
+
+class LocalSigner:
+    '''stand-in for the ESMS: signs claim digests with a throwaway key, <domain> is set once TokenDistributor is deployed'''
+    def __init__(self):
+        self.account = web3.eth.account.create()
+        self.domain = None
+        self.sign_time = 0.0
+        self.signed = 0
+
+    def sign(self, user_id, user_address, user_amount, delegate_address, leaf):
+        start = time.perf_counter()
+        digest = claim_digest(self.domain, user_id, user_address, user_amount, delegate_address, leaf)
+        signature = web3.eth.account.signHash(digest, self.account.key).signature
+        self.sign_time += time.perf_counter() - start
+        self.signed += 1
+        return digest, bytes(signature)
+
+def arrival_times(settings, rng):
+    '''seconds after launch each claimant shows up, sorted'''
+    count, window = settings['CLAIMANTS'], settings['ARRIVAL_WINDOW']
+    if settings['ARRIVAL_CURVE'] == 'uniform':
+        times = [rng.uniform(0, window) for _ in range(count)]
+    elif settings['ARRIVAL_CURVE'] == 'decay':
+        rate = 0.693147 / settings['DECAY_HALF_LIFE']
+        times = [min(rng.expovariate(rate), window) for _ in range(count)]
+    else: # burst - BURST_SHARE of everyone in the first minute, the rest spread over the window
+        burst = int(count * settings['BURST_SHARE'])
+        times = [rng.uniform(0, 60) for _ in range(burst)] + [rng.uniform(0, window) for _ in range(count - burst)]
+    return sorted(times)
+
+def signer_queue(arrivals, workers, sign_seconds):
+    '''(signed_at, queue_wait) per arrival with <workers> signing in parallel, first come first served'''
+    free_at = [0.0] * workers
+    results = []
+    for arrived in arrivals:
+        start = max(arrived, heapq.heappop(free_at))
+        heapq.heappush(free_at, start + sign_seconds)
+        results.append((start + sign_seconds, start - arrived))
+    return results
+
+def percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def rpc(method, params=None):
+    response = web3.provider.make_request(method, params or [])
+    if 'error' in response:
+        raise ValueError(f'{method}: {response["error"]}')
+    return response.get('result')
+
+def fund(addresses, amount):
+    '''gas money for every claimant - evm_setAccountBalance when the node has it, plain transfers when not'''
+    try:
+        for address in addresses:
+            rpc('evm_setAccountBalance', [address, hex(amount)])
+    except ValueError:
+        for address in addresses:
+            accounts[0].transfer(address, amount, silent=True)
+
+def build_tree(settings, rng):
+    '''random amounts for every leaf of the tree, returns (tree, amounts by user_id)'''
+    amounts = [Wei(f'{rng.randint(10, 1000)} ether') for _ in range(settings['TREE_LEAVES'])]
+    node_file = os.path.join(tempfile.mkdtemp(), 'claim_sim.nodes')
+    leaves = (leaf_hash(user_id, amount) for user_id, amount in enumerate(amounts))
+    return MerkleTree.create(node_file, leaves, count=len(amounts)), amounts
+
+def deploy(root, signer, total):
+    token = GTC.deploy(accounts[0], accounts[0], int(time.time()), {'from': accounts[0]})
+    timelock = Timelock.deploy(accounts[0], 172800, {'from': accounts[0]})
+    td = TokenDistributor.deploy(token.address, signer, timelock.address, '0x' + root.hex(), {'from': accounts[0]})
+    token.setGTCDist(td.address, {'from': accounts[0]})
+    token.transfer(td.address, total, {'from': accounts[0]})
+    return td
+
+def plan_claims(settings, rng, tree, amounts, user_ids, signer, td):
+    '''
+        sign every claim and pre-sign every tx we will send. Returns (claimants, txs, gas limit per claim),
+        txs as (submit_at, claimant index, is_duplicate, signed raw tx) sorted by when they are sent
+    '''
+    arrivals = arrival_times(settings, rng)
+    signed = signer_queue(arrivals, settings['SIGNER_WORKERS'], settings['SIGN_SECONDS'])
+    stewards = [web3.eth.account.create().address for _ in range(settings['STEWARDS'])]
+    gas_price = Wei(f'{settings["GAS_PRICE_GWEI"]} gwei')
+
+    chain_id = web3.eth.chain_id
+    claimant_accounts = [web3.eth.account.create() for _ in user_ids]
+    fund([account.address for account in claimant_accounts], Wei('1 ether'))
+
+    claimants = []
+    txs = []
+    gas = None
+    for index, (user_id, account, arrived, (signed_at, queue_wait)) in enumerate(zip(user_ids, claimant_accounts, arrivals, signed)):
+        roll = rng.random()
+        if roll < settings['SELF_DELEGATE_RATE']:
+            delegate = account.address
+        elif stewards and roll < 0.9:
+            delegate = stewards[min(int(rng.paretovariate(1.2)) - 1, len(stewards) - 1)] # a few stewards get most delegations
+        else:
+            delegate = web3.eth.account.create().address
+        amount, leaf, proof = amounts[user_id], tree.leaf(user_id), tree.proof(user_id)
+        digest, signature = signer.sign(user_id, account.address, amount, delegate, leaf)
+        data = td.claimTokens.encode_input(user_id, account.address, amount, delegate, digest, signature, proof, leaf)
+        claimants.append({'arrived': arrived, 'signed_at': signed_at, 'queue_wait': queue_wait, 'proof_depth': len(proof)})
+
+        if gas is None: # one estimate, every claim does the same work bar proof length & fresh checkpoints
+            gas = int(web3.eth.estimate_gas({'from': account.address, 'to': td.address, 'data': data}) * GAS_HEADROOM)
+        submit_at = signed_at + settings['SUBMIT_DELAY']
+        sends = [(submit_at, False)]
+        if rng.random() < settings['DUPLICATE_RATE']:
+            sends.append((submit_at + settings['DUPLICATE_DELAY'], True))
+        for nonce, (at, duplicate) in enumerate(sends):
+            tx = {'to': td.address, 'data': data, 'gas': gas, 'gasPrice': gas_price, 'nonce': nonce, 'chainId': chain_id}
+            txs.append((at, index, duplicate, bytes(account.sign_transaction(tx).rawTransaction)))
+    txs.sort(key=lambda tx: tx[0])
+    return claimants, txs, gas
+
+def simulate(settings, claimants, txs, gas):
+    '''send each tx when its time comes, mine a block every BLOCK_TIME, record where everything lands'''
+    block_time = settings['BLOCK_TIME']
+    launch = chain.time() + block_time
+    pending = {} # tx hash -> (submit_at, claimant index, is_duplicate)
+    included = [] # (submit_at, claimant index, is_duplicate, included_at, status)
+    rejected = [] # sends the node refused outright
+    blocks = []
+    next_tx = 0
+
+    rpc('miner_stop')
+    try:
+        now = 0
+        while (next_tx < len(txs) or pending) and len(blocks) < settings['MAX_BLOCKS']:
+            now += block_time
+            while next_tx < len(txs) and txs[next_tx][0] <= now:
+                submit_at, index, duplicate, raw = txs[next_tx]
+                try:
+                    pending['0x' + bytes(web3.eth.send_raw_transaction(raw)).hex()] = (submit_at, index, duplicate)
+                except ValueError as e:
+                    rejected.append((index, duplicate, str(e)))
+                next_tx += 1
+
+            chain.mine(timestamp=launch + now)
+            block = web3.eth.get_block('latest')
+            blocks.append((block['gasUsed'], block['gasLimit'], len(block['transactions'])))
+            for tx_hash in block['transactions']:
+                tx_hash = '0x' + bytes(tx_hash).hex()
+                if tx_hash in pending:
+                    submit_at, index, duplicate = pending.pop(tx_hash)
+                    status = web3.eth.get_transaction_receipt(tx_hash)['status']
+                    included.append((submit_at, index, duplicate, now, status))
+            if len(blocks) % 50 == 0:
+                print(f'  t+{now}s block {block["number"]}: {len(block["transactions"])} txs, {len(pending)} pending, {len(txs) - next_tx} still to send')
+    finally:
+        rpc('miner_start')
+    return included, rejected, blocks, len(pending)
+
+def report(settings, signer, claimants, included, rejected, blocks, left_pending, gas):
+    claims = [(submit_at, index, now) for submit_at, index, duplicate, now, status in included if not duplicate and status == 1]
+    from_arrival = [now - claimants[index]['arrived'] for _, index, now in claims]
+    from_submit = [now - submit_at for submit_at, _, now in claims]
+    duplicates = [status for _, _, duplicate, _, status in included if duplicate]
+    duplicate_reverts = duplicates.count(0) + sum(1 for _, duplicate, _ in rejected if duplicate)
+    failed = [index for _, index, duplicate, _, status in included if not duplicate and status == 0]
+    busy_blocks = [b for b in blocks if b[2]]
+    filled = [b for b in blocks if b[0] + gas > b[1]] # no room left for one more claim
+    waits = [c['queue_wait'] for c in claimants]
+    depths = [c['proof_depth'] for c in claimants]
+
+    summary = {
+        'claimants': len(claimants),
+        'claimed': len(claims),
+        'failed_claims': len(failed),
+        'never_included': left_pending,
+        'block_gas_limit': blocks[0][1] if blocks else 0,
+        'gas_per_claim_limit': gas,
+        'blocks': len(blocks),
+        'blocks_with_claims': len(busy_blocks),
+        'blocks_filled': len(filled),
+        'max_claims_per_block': max((b[2] for b in blocks), default=0),
+        'mean_claims_per_busy_block': sum(b[2] for b in busy_blocks) / len(busy_blocks) if busy_blocks else 0,
+        'inclusion_from_arrival_s': {p: percentile(from_arrival, p) for p in (50, 90, 99, 100)},
+        'inclusion_from_submit_s': {p: percentile(from_submit, p) for p in (50, 90, 99, 100)},
+        'signer_queue_wait_s': {p: round(percentile(waits, p), 3) for p in (50, 90, 99, 100)},
+        'signer_mean_local_sign_ms': round(1000 * signer.sign_time / max(signer.signed, 1), 3),
+        'duplicates_sent': len(duplicates) + sum(1 for _, duplicate, _ in rejected if duplicate),
+        'duplicate_reverts': duplicate_reverts,
+        'duplicate_revert_rate': duplicate_reverts / len(claimants) if claimants else 0,
+        'proof_depths': {depth: depths.count(depth) for depth in sorted(set(depths))},
+    }
+
+    if summary['block_gas_limit'] != settings['BLOCK_GAS_LIMIT']:
+        print(f'WARNING: chain block gas limit is {summary["block_gas_limit"]}, settings expect {settings["BLOCK_GAS_LIMIT"]}')
+    print(f'\n{summary["claimed"]}/{summary["claimants"]} claims included over {summary["blocks"]} blocks ({settings["ARRIVAL_CURVE"]} arrivals, {settings["BLOCK_TIME"]}s blocks)')
+    print(f'  gas limit per claim tx: {gas}, block gas limit: {summary["block_gas_limit"]}')
+    print(f'  claims per block: max {summary["max_claims_per_block"]}, mean {summary["mean_claims_per_busy_block"]:.1f} - {summary["blocks_filled"]} blocks filled')
+    print(f'  time to inclusion from arrival (s) p50/p90/p99/max: ' + '/'.join(f'{v:.0f}' for v in summary['inclusion_from_arrival_s'].values()))
+    print(f'  time to inclusion from submit (s)  p50/p90/p99/max: ' + '/'.join(f'{v:.0f}' for v in summary['inclusion_from_submit_s'].values()))
+    print(f'  signer queue wait (s) p50/p90/p99/max: ' + '/'.join(f'{v}' for v in summary['signer_queue_wait_s'].values())
+        + f' with {settings["SIGNER_WORKERS"]} workers at {settings["SIGN_SECONDS"]}s/claim')
+    print(f'  duplicate claims: {summary["duplicates_sent"]} sent, {summary["duplicate_reverts"]} reverted ({summary["duplicate_revert_rate"]:.2%} of claimants)')
+    print(f'  proof depths: ' + ', '.join(f'{depth}: {n}' for depth, n in summary['proof_depths'].items()))
+    if failed or left_pending:
+        print(f'  WARNING {len(failed)} first claims reverted, {left_pending} txs still pending after MAX_BLOCKS')
+
+    if settings['REPORT_FILE']:
+        with open(settings['REPORT_FILE'], 'w') as f:
+            json.dump({'settings': settings, 'summary': summary}, f, indent=2)
+        print(f'report written to {settings["REPORT_FILE"]}')
+    return summary
+
+def main():
+    env_file = os.environ.get('CLAIM_SIM_ENV', '.claim-sim-env')
+    try:
+        settings = load_settings(env_file)
+    except ValueError as e:
+        print(f'Unable to load settings from {env_file} - {e}')
+        sys.exit(1)
+    rng = random.Random(settings['SEED'])
+    load_brownie()
+
+    print(f'building a {settings["TREE_LEAVES"]} leaf tree')
+    tree, amounts = build_tree(settings, rng)
+    user_ids = rng.sample(range(settings['TREE_LEAVES']), settings['CLAIMANTS'])
+    signer = LocalSigner()
+    print('deploying GTC, Timelock & TokenDistributor')
+    td = deploy(tree.root(), signer.account.address, sum(amounts[user_id] for user_id in user_ids))
+    signer.domain = domain_separator(td.address)
+
+    print(f'signing {settings["CLAIMANTS"]} claims')
+    claimants, txs, gas = plan_claims(settings, rng, tree, amounts, user_ids, signer, td)
+    tree.close()
+
+    print(f'replaying {len(txs)} txs')
+    included, rejected, blocks, left_pending = simulate(settings, claimants, txs, gas)
+    return report(settings, signer, claimants, included, rejected, blocks, left_pending, gas)
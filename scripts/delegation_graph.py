@@ -0,0 +1,269 @@
+import argparse
+import csv
+import os
+import sys
+from array import array
+
+if __name__ == '__main__': # run from plain python, make scripts.* importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.event_stream import connect, event_topic, stream_logs, to_bytes, topic_to_address, data_words, word_to_int, ZERO_ADDRESS
+
+'''
+### TLDR:
+Delegation graph analytics for GTC holders.
+
+Rebuilds delegator -> delegatee links and balances from GTC Transfer & DelegateChanged events
+(this covers both delegateOnDist() at claim time and later delegate()/delegateBySig() calls),
+then reports steward voting power, concentration (Gini, Nakamoto coefficient against
+GovernorAlpha.quorumVotes() & proposalThreshold()) and steward churn between two blocks.
+
+Holders are interned to integer ids and state lives in flat arrays, so millions of holders
+replay in seconds once the events are cached locally.
+
+from terminal:
+`python scripts/delegation_graph.py <gtc_address> --from-block 12422079 --block-a 12500000 --block-b 12600000 --events-file gtc_events.csv`
+
+The events file is written on first run and re-used (and extended) on later runs.
+'''
+
+TRANSFER_TOPIC = event_topic('Transfer(address,address,uint256)')
+DELEGATE_CHANGED_TOPIC = event_topic('DelegateChanged(address,address,address)')
+
+# GovernorAlpha.sol - hardcoded, used when no governor address is given
+QUORUM_VOTES = 2_500_000 * 10**18
+PROPOSAL_THRESHOLD = 1_000_000 * 10**18
+
+TRANSFER = 'T'
+DELEGATE = 'D'
+NO_DELEGATE = -1
+
+def fetch_events(web3, gtc_address, from_block, to_block, chunk_size=5000):
+    '''yield (block, log_index, kind, a, b, amount) for every Transfer / DelegateChanged event, in chain order'''
+    topics = [[TRANSFER_TOPIC, DELEGATE_CHANGED_TOPIC]]
+    for log in stream_logs(web3, gtc_address, topics, from_block, to_block, chunk_size):
+        topic0 = '0x' + to_bytes(log['topics'][0]).hex()
+        if topic0 == TRANSFER_TOPIC:
+            amount = word_to_int(data_words(log['data'])[0])
+            yield (log['blockNumber'], log['logIndex'], TRANSFER, topic_to_address(log['topics'][1]), topic_to_address(log['topics'][2]), amount)
+        else: # DelegateChanged(delegator, fromDelegate, toDelegate) - all indexed
+            yield (log['blockNumber'], log['logIndex'], DELEGATE, topic_to_address(log['topics'][1]), topic_to_address(log['topics'][3]), 0)
+
+def read_events(events_file):
+    with open(events_file, 'r') as csvfile:
+        for row in csv.reader(csvfile):
+            yield int(row[0]), int(row[1]), row[2], row[3], row[4], int(row[5])
+
+def load_events(gtc_address, from_block, to_block, events_file=None):
+    '''
+        Events from the local cache file if there is one, fetching (and appending) anything
+        newer than the last cached block from the node.
+    '''
+    events = []
+    last_block = from_block - 1
+    if events_file and os.path.exists(events_file):
+        events = list(read_events(events_file))
+        if events:
+            last_block = max(last_block, events[-1][0])
+        events = [e for e in events if e[0] <= to_block]
+    if last_block < to_block:
+        web3 = connect()
+        fetched = list(fetch_events(web3, gtc_address, last_block + 1, to_block))
+        events.extend(fetched)
+        if events_file:
+            with open(events_file, 'a', newline='') as csvfile:
+                csv.writer(csvfile).writerows(fetched)
+    return events
+
+class DelegationGraph:
+    '''
+        Array backed holder state. Every address gets an integer id on first sight;
+        balances[id] is the GTC balance (wei) and delegates[id] the id of its delegatee, or NO_DELEGATE.
+    '''
+    def __init__(self):
+        self.ids = {}
+        self.addresses = []
+        self.balances = []
+        self.delegates = array('q')
+        self.block = 0
+
+    def _id(self, address):
+        holder = self.ids.get(address)
+        if holder is None:
+            holder = len(self.addresses)
+            self.ids[address] = holder
+            self.addresses.append(address)
+            self.balances.append(0)
+            self.delegates.append(NO_DELEGATE)
+        return holder
+
+    def apply(self, events, until_block=None):
+        '''apply events in chain order up to and including <until_block>, returns the number of events used'''
+        applied = 0
+        for block, _, kind, a, b, amount in events:
+            if until_block is not None and block > until_block:
+                break
+            if kind == TRANSFER:
+                if a != ZERO_ADDRESS: # mints come from the zero address
+                    self.balances[self._id(a)] -= amount
+                if b != ZERO_ADDRESS:
+                    self.balances[self._id(b)] += amount
+            else:
+                self.delegates[self._id(a)] = NO_DELEGATE if b == ZERO_ADDRESS else self._id(b)
+            self.block = block
+            applied += 1
+        return applied
+
+    def voting_power(self):
+        '''per-holder delegated votes, indexed by holder id - mirrors GTC.getCurrentVotes()'''
+        power = [0] * len(self.addresses)
+        balances = self.balances
+        for holder, delegatee in enumerate(self.delegates):
+            if delegatee != NO_DELEGATE:
+                power[delegatee] += balances[holder]
+        return power
+
+    def snapshot(self):
+        '''cheap copy of delegate links, balances + power, used for churn between two blocks'''
+        return Snapshot(self.block, array('q', self.delegates), list(self.balances), self.voting_power())
+
+class Snapshot:
+    def __init__(self, block, delegates, balances, power):
+        self.block = block
+        self.delegates = delegates
+        self.balances = balances
+        self.power = power
+
+    def stewards(self):
+        return {holder for holder, votes in enumerate(self.power) if votes > 0}
+
+def gini(values):
+    '''Gini coefficient of non-negative values, 0 = perfectly even, 1 = one holder has everything'''
+    values = sorted(v for v in values if v > 0)
+    total = sum(values)
+    if not values or total == 0:
+        return 0.0
+    weighted = sum((i + 1) * v for i, v in enumerate(values))
+    n = len(values)
+    return (2 * weighted) / (n * total) - (n + 1) / n
+
+def nakamoto(values, threshold, strict=False):
+    '''smallest number of stewards whose combined votes reach <threshold> (exceed it if strict), None if unreachable'''
+    running = 0
+    for count, votes in enumerate(sorted(values, reverse=True), start=1):
+        running += votes
+        if running > threshold or (not strict and running == threshold):
+            return count
+    return None
+
+def concentration(snapshot, quorum_votes=QUORUM_VOTES, proposal_threshold=PROPOSAL_THRESHOLD):
+    power = [votes for votes in snapshot.power if votes > 0]
+    return {
+        'block': snapshot.block,
+        'stewards': len(power),
+        'delegated_votes': sum(power),
+        'gini': gini(power),
+        'nakamoto_quorum': nakamoto(power, quorum_votes),
+        'nakamoto_proposal': nakamoto(power, proposal_threshold, strict=True), # propose() requires votes > proposalThreshold()
+        'stewards_over_proposal_threshold': sum(1 for votes in power if votes > proposal_threshold),
+    }
+
+def churn(before, after):
+    '''
+        how the steward set moved between two snapshots, counted per delegator:
+        votes_moved is the balance re-pointed from one steward to another, while new delegations,
+        dropped delegations and balance changes (transfers) of delegated holders get their own fields
+    '''
+    stewards_before = before.stewards()
+    stewards_after = after.stewards()
+    redelegated = 0
+    moved = newly_delegated = undelegated = from_transfers = 0
+    for holder, delegatee in enumerate(after.delegates):
+        known = holder < len(before.delegates)
+        previous = before.delegates[holder] if known else NO_DELEGATE
+        balance_before = before.balances[holder] if known else 0
+        balance_after = after.balances[holder]
+        if delegatee != previous:
+            redelegated += 1
+        if previous == NO_DELEGATE and delegatee != NO_DELEGATE:
+            newly_delegated += balance_after
+        elif previous != NO_DELEGATE and delegatee == NO_DELEGATE:
+            undelegated += balance_before
+        elif previous != NO_DELEGATE:
+            from_transfers += balance_after - balance_before
+            if delegatee != previous:
+                moved += min(balance_before, balance_after)
+    new_holders = len(after.delegates) - len(before.delegates)
+
+    return {
+        'from_block': before.block,
+        'to_block': after.block,
+        'stewards_joined': len(stewards_after - stewards_before),
+        'stewards_left': len(stewards_before - stewards_after),
+        'delegations_changed': redelegated,
+        'new_holders': new_holders,
+        'votes_moved': moved,
+        'votes_newly_delegated': newly_delegated,
+        'votes_undelegated': undelegated,
+        'votes_from_transfers': from_transfers, # net, delegated holders' balance changes
+    }
+
+def governor_thresholds(governor_address):
+    '''read quorumVotes() / proposalThreshold() from a deployed GovernorAlpha'''
+    web3 = connect()
+    abi = [
+        {'name': 'quorumVotes', 'type': 'function', 'stateMutability': 'pure', 'inputs': [], 'outputs': [{'name': '', 'type': 'uint256'}]},
+        {'name': 'proposalThreshold', 'type': 'function', 'stateMutability': 'pure', 'inputs': [], 'outputs': [{'name': '', 'type': 'uint256'}]},
+    ]
+    gov = web3.eth.contract(address=web3.toChecksumAddress(governor_address), abi=abi)
+    return gov.functions.quorumVotes().call(), gov.functions.proposalThreshold().call()
+
+def print_report(title, report):
+    print(f'\n{title}')
+    for key, value in report.items():
+        print(f'  {key}: {value}')
+
+def main():
+    parser = argparse.ArgumentParser(description='GTC delegation graph analytics')
+    parser.add_argument('gtc_address')
+    parser.add_argument('--from-block', type=int, required=True, help='GTC deploy block')
+    parser.add_argument('--block-a', type=int, required=True, help='first snapshot block')
+    parser.add_argument('--block-b', type=int, help='second snapshot block, for churn')
+    parser.add_argument('--events-file', help='local csv cache of decoded GTC events')
+    parser.add_argument('--governor', help='GovernorAlpha address to read quorumVotes()/proposalThreshold() from')
+    parser.add_argument('--top', type=int, default=10, help='number of top stewards to list')
+    args = parser.parse_args()
+
+    if args.block_b is not None and args.block_b < args.block_a:
+        print('--block-b must be >= --block-a')
+        sys.exit(1)
+
+    quorum_votes, proposal_threshold = QUORUM_VOTES, PROPOSAL_THRESHOLD
+    if args.governor:
+        quorum_votes, proposal_threshold = governor_thresholds(args.governor)
+
+    last_block = args.block_b if args.block_b is not None else args.block_a
+    events = load_events(args.gtc_address, args.from_block, last_block, args.events_file)
+    print(f'{len(events)} GTC events loaded')
+
+    graph = DelegationGraph()
+    used = graph.apply(events, args.block_a)
+    graph.block = args.block_a
+    snapshot_a = graph.snapshot()
+    print_report(f'Block {args.block_a}', concentration(snapshot_a, quorum_votes, proposal_threshold))
+
+    top = sorted(range(len(snapshot_a.power)), key=lambda holder: snapshot_a.power[holder], reverse=True)[:args.top]
+    print(f'\nTop {len(top)} stewards at block {args.block_a}:')
+    for holder in top:
+        if snapshot_a.power[holder] > 0:
+            print(f'  {graph.addresses[holder]} - {snapshot_a.power[holder] / 10**18:,.2f} GTC')
+
+    if args.block_b is not None:
+        graph.apply(events[used:], args.block_b)
+        graph.block = args.block_b
+        snapshot_b = graph.snapshot()
+        print_report(f'Block {args.block_b}', concentration(snapshot_b, quorum_votes, proposal_threshold))
+        print_report(f'Churn {args.block_a} -> {args.block_b}', churn(snapshot_a, snapshot_b))
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,15 @@
-from brownie import accounts, web3, GTC, TokenDistributor, Timelock, GovernorAlpha, TreasuryVester, Wei
 import time
 import sys
+import os
 from dotenv import dotenv_values
 import csv
+from decimal import Decimal, InvalidOperation
+
+if __name__ == '__main__': # plan mode from plain python, make scripts.* importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.tx_scheduler import TxScheduler, Step, StepFailed, deployed, dependency_waves
+from scripts.fee_strategy import FeeEngine, ChainFeeHistory
 
 ''' 
 ### TLDR:
@@ -31,117 +38,160 @@ from terminal:
 `accounts.from_mnemonic('your-mnemonic-here',10)`
 
 5) network.gas_limit(10000000)
-6) network.gas_price("2 gwei")
+6) fees - with EIP1559_FEES=True fees are estimated from recent blocks by scripts/fee_strategy.py and stuck txs
+   are re-sent with bumped fees (capped by MAX_FEE_GWEI). Otherwise set a legacy price: network.gas_price("2 gwei")
 
 7) run('deploy-all')
 
+Transactions are sent through scripts/tx_scheduler.py - steps that don't depend on each other are sent
+together and confirmed in one polling loop (CONFIRMATIONS blocks deep), so total deploy time follows the
+depth of the dependency graph rather than the number of transactions.
+
+### plan mode - no brownie import, no node connection
+Validates every env value (all errors reported in one pass), loads the team/funders payout csvs and prints
+the ordered step plan with amounts & addresses:
+`python scripts/deploy-all.py --plan` (or `--plan path/to/env-file`), or from the brownie console run('deploy-all', 'plan')
+
 GTC Token deploy will mint tokens to first param, since distributor has not been deployed yet, we send to HOPPER_ADDRESS
 HOPPER_ADDRESS then needs to send to dist contract before claims will process (so tokendist has coins to send!)
 '''
 
 env_file = ".deploy-all-local-env"
 
+PAYOUT_TX_GAS = 100000 # upper bound for one GTC transfer, incl. delegate checkpoint writes
+
 def main():
+    configure() # parse & validate envars, exits listing every problem found
+    load_brownie()
     loginfo() # print out some relevant info about our environment 
-  
-    if VALIDATE_PARAMS: # check hardcoded contract params against constructor params 
-         validate_params() 
-    
-    # [[ deploy tx #1 - TIMELOCK.sol]]
-    try:
-        tl = Timelock.deploy(TIMELOCK_ADMIN, TIMELOCK_DELAY, {'from': DEPLOY_FROM}, publish_source=PUBLISH_SOURCE)
-    except Exception as e:
-        print(f'Error on Timelock deploy: {e}')
-        sys.exit(1)
 
-    # [[ deploy tx #2 - GTC.sol]]
-    try:
-        gtc = GTC.deploy(HOPPER_ADDRESS, HOPPER_ADDRESS, GTC_MINT_AFTER, {'from': DEPLOY_FROM}, publish_source=PUBLISH_SOURCE)
-    except Exception as e:
-        print(f'Error on GTC contract deploy {e}')
-        sys.exit(1)
-    
-    # [[ deploy tx #3 - Tokendistributor.sol ]]
-    try:
-        td = TokenDistributor.deploy(gtc.address, TOKEN_CLAIM_SIGNER, tl.address, MERKLE_ROOT, {'from': DEPLOY_FROM}, publish_source=PUBLISH_SOURCE)
-    except Exception as e:
-        print(f'Error on TokenDistributor contract deploy: {e}')
-        sys.exit(1)
+    fee_engine, max_in_flight = None, None
+    if EIP1559_FEES:
+        max_fee = Wei(f'{MAX_FEE_GWEI} gwei') if MAX_FEE_GWEI else None
+        fee_engine = FeeEngine(ChainFeeHistory(web3), target_blocks=FEE_TARGET_BLOCKS, max_fee=max_fee)
+        max_in_flight = fee_engine.batch_size(PAYOUT_TX_GAS) # so a big payout doesn't crowd out its own inclusion
+        print(f'EIP-1559 fees: {fee_engine.estimate()}, up to {max_in_flight} txs in flight\n')
+
+    # independent steps are sent together, each step waits only on the steps it depends on
+    scheduler = TxScheduler(web3, confirmations=CONFIRMATIONS, fee_engine=fee_engine, max_in_flight=max_in_flight)
+    for step in deploy_steps():
+        scheduler.add(step)
 
-    # [[ deploy tx #4 - GovernorAlpha.sol ]] 
     try:
-        gov = GovernorAlpha.deploy(tl.address, gtc.address, {'from' : DEPLOY_FROM}, publish_source=PUBLISH_SOURCE)
-    except Exception as e:
-        print(f'Error on GovernorAlpha deploy: {e}')
-        sys.exit(1)
-    
-    # [[ deploy tx #5 - TreasuryVester.sol ]] 
-    try: 
-        tv = TreasuryVester.deploy(gtc.address, tl.address, Wei(f'{TREASURY_VESTING_AMOUNT} ether'), TREASURY_VESTING_BEGIN, TREASURY_VESTING_CLIFF, TREASURY_VESTING_END, {'from' : DEPLOY_FROM}, publish_source=PUBLISH_SOURCE)
-    except Exception as e:
-        print(f'Error on TreasuryVesting deploy: {e}')
+        results = scheduler.run()
+    except StepFailed as e:
+        print(f'Error on {e}')
         sys.exit(1)
 
-    # allow token dist contract to set delegate addresses on the token contract 
-    try: 
-        set_GTCToken_address(td, gtc)
-    except Exception as e:
-        print(f'error running set_GTCToken_Address {e}')
-        sys.exit(1) 
+    print(f'Token now has the TokenDistribution address set to: {results["GTC"].GTCDist()}')
+    print(f'Token minter address is now set to address: {results["GTC"].minter()}')
 
-    # now that we've set the token dist address on the token contract
-    # we need to set the minter on the token to the Timelock address 
-    try: 
-        set_minter(gtc, tl)
-    except Exception as e:
-        print(f'Error setting minter address on token contract')    
-        sys.exit(1)
-    
-    ## DISTRIBUTE INITIAL TOKENS ## 
-    # 1) - 1/2 to TokenDistributor
-    try:  
-        gtc.transfer(td.address,Wei(f'{INITIAL_MINT/2} ether'), {'from': HOPPER_ADDRESS})
-    except Exception as e:
-        print(f'Error transfering coins to TokenDistribution contract')
-        sys.exit(1)
-
-    # 2) - transfer some coins to team 
-    try: 
-        transfer_to_team(gtc)
-    except Exception as e:
-        print(f'Error sending coins to team!')
-        sys.exit(1)
-
-    # 3) - transfer some coins to funders
-    try: 
-        transfer_to_funders(gtc)
-    except Exception as e:
-        print(f'Error sending coins to funders league!')
-        sys.exit(1)
+    # end main()
 
-    # 4) - transfer remaining coins to TreasuryVester
+def plan(path=None):
+    '''Print the full ordered deploy plan without importing brownie or touching a node'''
+    configure(path)
+    steps = deploy_steps()
+    print(f'\nDeploy plan - {len(steps)} transactions in {len(dependency_waves(steps))} rounds\n')
+    for number, wave in enumerate(dependency_waves(steps), start=1):
+        print(f'round {number}:')
+        for step in wave:
+            print(f'  {step.name} - {step.describe}')
+    print(f'\nCONFIRMATIONS={CONFIRMATIONS}, EIP1559_FEES={EIP1559_FEES}, VALIDATE_PARAMS={VALIDATE_PARAMS}')
+
+def load_brownie():
+    '''brownie is only imported when we actually deploy, plan mode never pays for it'''
+    global accounts, web3, GTC, TokenDistributor, Timelock, GovernorAlpha, TreasuryVester, Wei
+    from brownie import accounts, web3, GTC, TokenDistributor, Timelock, GovernorAlpha, TreasuryVester, Wei
+
+def deploy_steps():
+    '''Every deploy & config transaction as a Step, with the steps it depends on'''
+    steps = [
+        # [[ deploy tx #1 - TIMELOCK.sol]]
+        Step('Timelock', lambda r, tx: Timelock.deploy(TIMELOCK_ADMIN, TIMELOCK_DELAY, {'from': DEPLOY_FROM, **tx}),
+            resolve=deploy_and_publish('Timelock'), describe=f'Timelock.deploy(admin={TIMELOCK_ADMIN}, delay={TIMELOCK_DELAY}s) from {DEPLOY_FROM}'),
+
+        # [[ deploy tx #2 - GTC.sol]]
+        Step('GTC', lambda r, tx: GTC.deploy(HOPPER_ADDRESS, HOPPER_ADDRESS, GTC_MINT_AFTER, {'from': DEPLOY_FROM, **tx}),
+            resolve=deploy_and_publish('GTC'), describe=f'GTC.deploy(account={HOPPER_ADDRESS}, minter={HOPPER_ADDRESS}, mintingAllowedAfter={GTC_MINT_AFTER}) from {DEPLOY_FROM}'),
+
+        # [[ deploy tx #3 - Tokendistributor.sol ]]
+        Step('TokenDistributor', lambda r, tx: TokenDistributor.deploy(r['GTC'].address, TOKEN_CLAIM_SIGNER, r['Timelock'].address, MERKLE_ROOT, {'from': DEPLOY_FROM, **tx}),
+            deps=['GTC', 'Timelock'], resolve=deploy_and_publish('TokenDistributor'), describe=f'TokenDistributor.deploy(GTC, signer={TOKEN_CLAIM_SIGNER}, Timelock, merkleRoot={MERKLE_ROOT}) from {DEPLOY_FROM}'),
+
+        # [[ deploy tx #4 - GovernorAlpha.sol ]] 
+        Step('GovernorAlpha', lambda r, tx: GovernorAlpha.deploy(r['Timelock'].address, r['GTC'].address, {'from': DEPLOY_FROM, **tx}),
+            deps=['GTC', 'Timelock'], resolve=deploy_and_publish('GovernorAlpha'), describe=f'GovernorAlpha.deploy(Timelock, GTC) from {DEPLOY_FROM}'),
+
+        # [[ deploy tx #5 - TreasuryVester.sol ]] 
+        Step('TreasuryVester', lambda r, tx: TreasuryVester.deploy(r['GTC'].address, r['Timelock'].address, Wei(f'{TREASURY_VESTING_AMOUNT} ether'), TREASURY_VESTING_BEGIN, TREASURY_VESTING_CLIFF, TREASURY_VESTING_END, {'from': DEPLOY_FROM, **tx}),
+            deps=['GTC', 'Timelock'], resolve=deploy_and_publish('TreasuryVester'),
+            describe=f'TreasuryVester.deploy(GTC, Timelock, {format_gtc(TREASURY_VESTING_AMOUNT * 10**18)}, begin={TREASURY_VESTING_BEGIN}, cliff={TREASURY_VESTING_CLIFF}, end={TREASURY_VESTING_END}) from {DEPLOY_FROM}'),
+
+        # allow token dist contract to set delegate addresses on the token contract 
+        Step('setGTCDist', lambda r, tx: r['GTC'].setGTCDist(r['TokenDistributor'].address, {'from': HOPPER_ADDRESS, **tx}),
+            deps=['GTC', 'TokenDistributor'], describe=f'GTC.setGTCDist(TokenDistributor) from {HOPPER_ADDRESS}'),
+
+        # now that we've set the token dist address on the token contract
+        # we need to set the minter on the token to the Timelock address (only the current minter can call setGTCDist)
+        Step('setMinter', lambda r, tx: r['GTC'].setMinter(r['Timelock'].address, {'from': HOPPER_ADDRESS, **tx}),
+            deps=['GTC', 'Timelock', 'setGTCDist'], describe=f'GTC.setMinter(Timelock) from {HOPPER_ADDRESS}'),
+
+        ## DISTRIBUTE INITIAL TOKENS ## 
+        # 1) - 1/2 to TokenDistributor
+        Step('transfer to TokenDistributor', lambda r, tx: r['GTC'].transfer(r['TokenDistributor'].address, Wei(f'{INITIAL_MINT/2} ether'), {'from': HOPPER_ADDRESS, **tx}),
+            deps=['GTC', 'TokenDistributor'], describe=f'{format_gtc(INITIAL_MINT * 10**18 // 2)} to TokenDistributor from {HOPPER_ADDRESS}'),
+    ]
+
+    # 2) - transfer some coins to team, 3) - transfer some coins to funders
+    steps += transfer_steps('team', TEAM_PAYOUTS)
+    steps += transfer_steps('funders', FUNDERS_PAYOUTS)
+
+    # 4) - transfer remaining coins to TreasuryVester, once every other hopper transfer has landed
+    hopper_transfers = [step.name for step in steps if step.name.startswith('transfer')]
+    remaining = INITIAL_MINT * 10**18 - INITIAL_MINT * 10**18 // 2 - sum(amount for _, amount in TEAM_PAYOUTS + FUNDERS_PAYOUTS)
+    steps.append(Step('transfer to TreasuryVester', lambda r, tx: r['GTC'].transfer(r['TreasuryVester'].address, r['GTC'].balanceOf(HOPPER_ADDRESS), {'from': HOPPER_ADDRESS, **tx}),
+        deps=['GTC', 'TreasuryVester'] + hopper_transfers, describe=f'remaining hopper balance (expected {format_gtc(remaining)}) to TreasuryVester from {HOPPER_ADDRESS}'))
+    return steps
+
+def transfer_steps(name, payouts):
+    '''One transfer step per row of a team/funders payout csv'''
+    steps = []
+    for number, (address, amount) in enumerate(payouts):
+        steps.append(Step(f'transfer to {name} #{number}', lambda r, tx, address=address, amount=amount: r['GTC'].transfer(address, amount, {'from': HOPPER_ADDRESS, **tx}),
+            deps=['GTC'], describe=f'{format_gtc(amount)} to {address} from {HOPPER_ADDRESS}'))
+    return steps
+
+def format_gtc(wei):
+    '''wei -> "1,234.5 GTC" without float rounding'''
+    return f'{(Decimal(wei) / 10**18).normalize():,f} GTC'
+
+def load_payouts(dist_file, name, errors):
+    '''(address, amount in wei) for every row of a payout csv, problems are added to <errors>'''
+    payouts = []
     try:
-        hopper_balance = gtc.balanceOf(HOPPER_ADDRESS) 
-        gtc.transfer(tv.address, hopper_balance, {'from': HOPPER_ADDRESS})
-    except Exception as e:
-        print(f'Error sending coins to TreasuryVester: {e}')
-        sys.exit(1)
-
-    # end main()
-     
-def transfer_to_team(gtc):
-    '''Transfer team coins to coinbase custody'''
-    with open("./scripts/team.csv", 'r') as csvfile:
-        team = csv.reader(csvfile)
-        for row in team:
-            gtc.transfer(row[0],row[1], {'from': HOPPER_ADDRESS})      
-
-def transfer_to_funders(gtc):
-    '''Transfer funders league coins'''
-    with open(env['FUNDERS_DIST'], 'r') as csvfile:
-        funders = csv.reader(csvfile)
-        for row in funders:
-            gtc.transfer(row[0],row[1], {'from': HOPPER_ADDRESS})
+        with open(dist_file, 'r') as csvfile:
+            for number, row in enumerate(csv.reader(csvfile)):
+                try:
+                    payouts.append((valid_address(row[0], f'{name} row {number} address'), valid_amount(row[1], f'{name} row {number} amount')))
+                except (ValueError, IndexError) as e:
+                    errors.append(str(e))
+    except OSError as e:
+        errors.append(f'Unable to read {name} file {dist_file} - {e}')
+    return payouts
+
+def deploy_and_publish(name):
+    '''resolve a confirmed deploy to its contract, verifying source on Etherscan if PUBLISH_SOURCE=True'''
+    def resolve(results, receipt):
+        container = globals()[name] # contract containers only exist once brownie is loaded
+        contract = deployed(container)(results, receipt)
+        if PUBLISH_SOURCE:
+            try:
+                container.publish_source(contract)
+            except Exception as e: # the contract is deployed, don't abort the steps that depend on it
+                print(f'WARNING: unable to publish {name} source for {contract.address}, verify it manually - {e}')
+        return contract
+    return resolve
 
 def loginfo():
     '''log some helpful into to the console'''
@@ -150,35 +200,19 @@ def loginfo():
         print(f"account #: {account_number} - {accounts[account_number]}")
     print("\n")    
 
-def set_GTCToken_address(td, gtc):
-    '''Call this to set the GTCToken Address on the TokenDistributor contract. 
-       This is needed because we have to deploy the GTCToken contract before the token distributor
-    '''
-    gtc.setGTCDist(td.address, {'from': HOPPER_ADDRESS})
-    print(f'Token now has the TokenDistribution address set to: {gtc.GTCDist()}')
-
-def set_minter(gtc, tl):
-    '''set minter address on the token contract'''
-    gtc.setMinter(tl.address, {'from': HOPPER_ADDRESS})
-    print(f'Token minter address is now set to address: {gtc.minter()}')
-
 def valid_address(address, name):
     '''used to validate an address'''
-    try:
-        valid_address = web3.toChecksumAddress(address)
-    except ValueError:
-        print(f'{name} does not appear to be a valid Ethereum address. Please confirm address is correct and try again.')
-        sys.exit(1)
-    return valid_address    
+    from eth_utils import to_checksum_address, is_address
+    if not isinstance(address, str) or not is_address(address):
+        raise ValueError(f'{name} does not appear to be a valid Ethereum address. Please confirm address is correct and try again.')
+    return to_checksum_address(address)
 
 def valid_unix_time(time, name):
     '''used to validate that a given unix time param is valid'''
     try:
-        valid_unix_time = int(time)
-        return valid_unix_time
-    except ValueError:
-        print(f'Invalid unix time found for: {name}. Please confirm {name} is an integer and try again.')
-        sys.exit(1)
+        return int(time)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid unix time found for: {name}. Please confirm {name} is an integer and try again.')
     
 def valid_boolean(value, name):
     '''return bool'''
@@ -186,79 +220,143 @@ def valid_boolean(value, name):
         return True
     if value == 'False' or value == 'false':
         return False
-    else:
-        print(f'{name} must be True or False. Please check {name} and try again.')
-        sys.exit(1)
+    raise ValueError(f'{name} must be True or False. Please check {name} and try again.')
 
 def valid_hexstr(value, name):
-    '''Primitive/limited check to confirm we have a valid hexstr'''
+    '''Primitive/limited check to confirm we have a valid bytes32 hexstr'''
     try:
-        web3.toBytes(hexstr=value)
-        return value
-    except Exception as e:
-        print(f'{name} does not appear to be a valid hexstr.')
-        sys.exit(1)
+        raw = bytes.fromhex(value[2:] if value.startswith('0x') else value)
+    except (AttributeError, ValueError):
+        raise ValueError(f'{name} does not appear to be a valid hexstr.')
+    if len(raw) != 32:
+        raise ValueError(f'{name} should be 32 bytes, found {len(raw)}.')
+    return value
 
 def valid_int(value, name):
     '''Confrim value is a valid integer'''
     try:
         int_value = int(value)
-        if str(int_value) == value:
-            return int_value
-        else:
-            raise ValueError(f'{name} does not have a valid value')
-    except Exception as e:
-        print(f'There was an issue validating {name} - {e}')
+    except (TypeError, ValueError):
+        int_value = None
+    if int_value is None or str(int_value) != value:
+        raise ValueError(f'There was an issue validating {name} - {name} does not have a valid value')
+    return int_value
+
+def valid_amount(value, name):
+    '''token amount in wei - a plain integer, or brownie style "<amount> ether" / "<amount> gwei"'''
+    units = {'ether': 10**18, 'gwei': 10**9, 'wei': 1}
+    parts = str(value).strip().split()
+    try:
+        amount = Decimal(parts[0]) * units[parts[1] if len(parts) > 1 else 'wei']
+    except (IndexError, KeyError, InvalidOperation):
+        raise ValueError(f'There was an issue validating {name} - {value} is not a valid amount')
+    if len(parts) > 2 or amount != amount.to_integral_value() or amount < 0:
+        raise ValueError(f'There was an issue validating {name} - {value} is not a valid amount')
+    return int(amount)
+
+def param_errors(config):
+    '''
+        Compare constructor params with hardcoded contract params to make sure we wont fail deploy.
+        Each check only runs when the values it needs parsed, so these are reported alongside any parse errors.
+    '''
+    errors = []
+    # MINIMUM_DELAY / MAXIMUM_DELAY fall back to a '0' default, only compare against values that were given
+    given = {name: value for name, value in config.items() if name not in ('MINIMUM_DELAY', 'MAXIMUM_DELAY') or config['env'].get(name) is not None}
+    def have(*names):
+        return all(name in given for name in names)
 
-def validate_params():
-    '''Compare constructor params with hardcoded contract params to make sure we wont fail deploy'''
     # TIMELOCK.sol
-    if not TIMELOCK_DELAY >= MINIMUM_DELAY:
-        print(f'TIMELOCK_DELAY must be >= MINIMUM_DELAY. Exiting deploy as per VALIDATE_PARAMS=True')
-        sys.exit(1)
-    if not TIMELOCK_DELAY <= MAXIMUM_DELAY:
-        print(f'TIMELOCK_DELAY must be <= MAXIMUM_DELAY. Exiting deploy as per VALIDATE_PARAMS=True')
-        sys.exit(1)
+    for name in ('MINIMUM_DELAY', 'MAXIMUM_DELAY'):
+        if config['env'].get(name) is None:
+            errors.append(f'{name} is required when VALIDATE_PARAMS=True')
+    if have('TIMELOCK_DELAY', 'MINIMUM_DELAY') and not given['TIMELOCK_DELAY'] >= given['MINIMUM_DELAY']:
+        errors.append(f'TIMELOCK_DELAY must be >= MINIMUM_DELAY. Exiting deploy as per VALIDATE_PARAMS=True')
+    if have('TIMELOCK_DELAY', 'MAXIMUM_DELAY') and not given['TIMELOCK_DELAY'] <= given['MAXIMUM_DELAY']:
+        errors.append(f'TIMELOCK_DELAY must be <= MAXIMUM_DELAY. Exiting deploy as per VALIDATE_PARAMS=True')
     
     # GTC.sol 
-    if not GTC_MINT_AFTER >= time.time():
-        print(f'GTC_MINT_AFTER must be >= current block time - minting can only begin after deployment. Exiting deploy as per VALIDATE_PARAMS=True')
-        sys.exit(1)
+    if have('GTC_MINT_AFTER') and not given['GTC_MINT_AFTER'] >= time.time():
+        errors.append(f'GTC_MINT_AFTER must be >= current block time - minting can only begin after deployment. Exiting deploy as per VALIDATE_PARAMS=True')
     
     # TreasuryVester.sol 
-    if not TREASURY_VESTING_BEGIN >= time.time():
-        print(f'TREASURY_VESTING_BEGIN must be >= deploy time - vesting begin too early')
-        sys.exit(1)
-    if not TREASURY_VESTING_CLIFF >= TREASURY_VESTING_BEGIN:
-        print(f'TREASURY_VESTING_CLIFF must be >= TREASURY_VESTING_BEGIN - cliff is too early')
-        sys.exit(1)
-    if not TREASURY_VESTING_END > TREASURY_VESTING_CLIFF:
-        print(f'TREASURY_VESTING_END must be > TREASURY_VESTING_CLIFF - end is too early')
+    if have('TREASURY_VESTING_BEGIN') and not given['TREASURY_VESTING_BEGIN'] >= time.time():
+        errors.append(f'TREASURY_VESTING_BEGIN must be >= deploy time - vesting begin too early')
+    if have('TREASURY_VESTING_BEGIN', 'TREASURY_VESTING_CLIFF') and not given['TREASURY_VESTING_CLIFF'] >= given['TREASURY_VESTING_BEGIN']:
+        errors.append(f'TREASURY_VESTING_CLIFF must be >= TREASURY_VESTING_BEGIN - cliff is too early')
+    if have('TREASURY_VESTING_CLIFF', 'TREASURY_VESTING_END') and not given['TREASURY_VESTING_END'] > given['TREASURY_VESTING_CLIFF']:
+        errors.append(f'TREASURY_VESTING_END must be > TREASURY_VESTING_CLIFF - end is too early')
+
+    # payouts have to fit in what's left after the TokenDistributor half (rows that failed to parse aren't counted)
+    if have('INITIAL_MINT'):
+        payouts = sum(amount for _, amount in config['TEAM_PAYOUTS'] + config['FUNDERS_PAYOUTS'])
+        if payouts > given['INITIAL_MINT'] * 10**18 - given['INITIAL_MINT'] * 10**18 // 2:
+            errors.append(f'team + funders payouts ({format_gtc(payouts)}) exceed the hopper balance left after the TokenDistributor transfer')
+    return errors
+
+# name, validator, default (None = required)
+ENV_PARAMS = [
+    ('TIMELOCK_ADMIN', valid_address, None), # ends up as
+    ('TIMELOCK_DELAY', valid_unix_time, None), # delay in seconds before a proposal can be executed 
+    ('DEPLOY_FROM', valid_address, None),
+    ('PUBLISH_SOURCE_TO_ETHERSCAN', valid_boolean, None),
+    ('GTC_MINT_AFTER', valid_unix_time, None),
+    ('HOPPER_ADDRESS', valid_address, None), # Temp address used during initial deploy
+    ('TOKEN_CLAIM_SIGNER', valid_address, None),
+    ('MERKLE_ROOT', valid_hexstr, None),
+    ('TREASURY_VESTING_AMOUNT', valid_int, None),
+    ('TREASURY_VESTING_BEGIN', valid_unix_time, None),
+    ('TREASURY_VESTING_CLIFF', valid_unix_time, None),
+    ('TREASURY_VESTING_END', valid_unix_time, None),
+    ('VALIDATE_PARAMS', valid_boolean, None), # should we proactively check that params wont fail deploy?
+    ('INITIAL_MINT', valid_int, None), # total amount initially minted 
+    ('CONFIRMATIONS', valid_int, '1'), # blocks on top of a tx before dependent steps are sent
+    ('EIP1559_FEES', valid_boolean, 'False'), # estimate fees from recent blocks instead of a fixed gas price
+    ('FEE_TARGET_BLOCKS', valid_int, '3'), # blocks we aim to get each tx included within
+    ('MAX_FEE_GWEI', valid_int, '0'), # never pay more than this per gas, 0 for no cap
+    # what are the hardcoded params from Timelock? only needed with VALIDATE_PARAMS=True
+    ('MINIMUM_DELAY', valid_unix_time, '0'),
+    ('MAXIMUM_DELAY', valid_unix_time, '0'),
+]
+
+def load_config(path=None):
+    '''Parse every envar, returns (config, errors) - errors holds every problem found, not just the first'''
+    errors = []
+    try:
+        env = dotenv_values(path or env_file)
+    except Exception as e:
+        return {}, [f'Unable to load environment variables. Please confirm file exists - {e}']
+    if not env:
+        return {}, [f'Unable to load environment variables. Please confirm {path or env_file} exists and is not empty']
+
+    config = {'env': env}
+    for name, validator, default in ENV_PARAMS:
+        value = env.get(name, default)
+        if value is None:
+            errors.append(f'{name} is missing from {path or env_file}')
+            continue
+        try:
+            config[name] = validator(value, name)
+        except ValueError as e:
+            errors.append(str(e))
+    config['PUBLISH_SOURCE'] = config.pop('PUBLISH_SOURCE_TO_ETHERSCAN', None)
+    config['TEAM_PAYOUTS'] = load_payouts(env.get('TEAM_DIST', './scripts/team.csv'), 'TEAM_DIST', errors) # optional, team.csv was hardcoded before
+    config['FUNDERS_PAYOUTS'] = load_payouts(env.get('FUNDERS_DIST', ''), 'FUNDERS_DIST', errors)
+    return config, errors
+
+def configure(path=None):
+    '''load up the envars into module globals, or list every problem and exit'''
+    config, errors = load_config(path)
+    if config.get('VALIDATE_PARAMS'): # check hardcoded contract params against constructor params 
+        errors += param_errors(config)
+    if errors:
+        print(f'Found {len(errors)} problem(s) with the deploy config:')
+        for error in errors:
+            print(f'  - {error}')
         sys.exit(1)
+    globals().update(config)
 
-# load up the envars 
-try:
-    env = dotenv_values(env_file)
-except Exception as e:
-    print(f'Unable to load environment variables. Please confirm file exists - {e}')
-    sys.exit(1)
-
-TIMELOCK_ADMIN = valid_address(env['TIMELOCK_ADMIN'], 'TIMELOCK_ADMIN') # ends up as
-TIMELOCK_DELAY = valid_unix_time(env['TIMELOCK_DELAY'], 'TIMELOCK_DELAY') # delay in seconds before a proposal can be executed 
-DEPLOY_FROM = valid_address(env['DEPLOY_FROM'], 'DEPLOY_FROM')
-PUBLISH_SOURCE = valid_boolean(env['PUBLISH_SOURCE_TO_ETHERSCAN'], 'PUBLISH_SOURCE')
-GTC_MINT_AFTER = valid_unix_time(env['GTC_MINT_AFTER'], 'GTC_MINT_AFTER')
-HOPPER_ADDRESS = valid_address(env['HOPPER_ADDRESS'], 'HOPPER_ADDRESS') # Temp address used during initial deploy
-TOKEN_CLAIM_SIGNER = valid_address(env['TOKEN_CLAIM_SIGNER'], 'TOKEN_CLAIM_SIGNER')
-MERKLE_ROOT = valid_hexstr(env['MERKLE_ROOT'], 'MERKLE_ROOT')
-TREASURY_VESTING_AMOUNT = valid_int(env['TREASURY_VESTING_AMOUNT'], 'TREASURY_VESTING_AMOUNT')
-TREASURY_VESTING_BEGIN = valid_unix_time(env['TREASURY_VESTING_BEGIN'], 'TREASURY_VESTING_BEGIN')
-TREASURY_VESTING_CLIFF = valid_unix_time(env['TREASURY_VESTING_CLIFF'], 'TREASURY_VESTING_CLIFF')
-TREASURY_VESTING_END = valid_unix_time(env['TREASURY_VESTING_END'], 'TREASURY_VESTING_END')
-VALIDATE_PARAMS = valid_boolean(env['VALIDATE_PARAMS'], 'VALIDATE_PARAMS') # should we proactively check that params wont fail deploy?
-INITIAL_MINT = valid_int(env['INITIAL_MINT'], 'INITIAL_MINT') # total amount initially minted 
-
-if VALIDATE_PARAMS:
-    # what are the hardcoded params from Timelock?
-    MINIMUM_DELAY = valid_unix_time(env['MINIMUM_DELAY'], 'MINIMUM_DELAY')
-    MAXIMUM_DELAY = valid_unix_time(env['MAXIMUM_DELAY'], 'MAXIMUM_DELAY')
\ No newline at end of file
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != '--plan':
+        print('usage: python scripts/deploy-all.py --plan [env-file] - deploys run through brownie: run(\'deploy-all\')')
+        sys.exit(1)
+    plan(sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,73 @@
+import os
+import sys
+from eth_utils import keccak
+
+'''
+### TLDR:
+Shared helpers for scripts that read contract events straight from a node.
+
+Logs are pulled with eth_getLogs in block-range chunks and decoded by hand from topics/data,
+which keeps things fast enough to walk millions of GTC events without building web3 contract objects.
+If a node refuses a range (too many results / timeout) the chunk is halved and retried.
+
+connect() uses WEB3_PROVIDER_URI, or the infura project id brownie already expects:
+`export WEB3_INFURA_PROJECT_ID=''`
+'''
+
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+
+def connect(network='mainnet'):
+    '''plain web3 connection, no brownie startup needed'''
+    from web3 import Web3
+    uri = os.environ.get('WEB3_PROVIDER_URI')
+    if not uri and os.environ.get('WEB3_INFURA_PROJECT_ID'):
+        uri = f"https://{network}.infura.io/v3/{os.environ['WEB3_INFURA_PROJECT_ID']}"
+    if not uri:
+        print('Please set WEB3_PROVIDER_URI or WEB3_INFURA_PROJECT_ID to read events from a node.')
+        sys.exit(1)
+    return Web3(Web3.HTTPProvider(uri, request_kwargs={'timeout': 120}))
+
+def event_topic(signature):
+    '''topic0 for an event signature, e.g. "Transfer(address,address,uint256)"'''
+    return '0x' + keccak(text=signature).hex()
+
+def to_bytes(value):
+    '''topics/data come back as HexBytes or hex strings depending on the web3 version'''
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith('0x') else value)
+    return bytes(value)
+
+def topic_to_address(topic):
+    '''indexed address topic -> lower case 0x address'''
+    return '0x' + to_bytes(topic)[-20:].hex()
+
+def data_words(data):
+    '''split non-indexed event data into 32 byte words'''
+    raw = to_bytes(data)
+    return [raw[i:i + 32] for i in range(0, len(raw), 32)]
+
+def word_to_int(word):
+    return int.from_bytes(word, 'big')
+
+def stream_logs(web3, address, topics, from_block, to_block, chunk_size=5000, min_chunk_size=1):
+    '''
+        Yield raw logs for <address>/<topics> between from_block and to_block (inclusive), in chain order.
+        <topics> is an eth_getLogs topic filter, e.g. [[transfer_topic, delegate_topic]] to OR two events.
+    '''
+    start = from_block
+    size = chunk_size
+    while start <= to_block:
+        end = min(start + size - 1, to_block)
+        try:
+            logs = web3.eth.get_logs({'address': address, 'topics': topics, 'fromBlock': start, 'toBlock': end})
+        except Exception as e:
+            if size <= min_chunk_size:
+                raise
+            size = max(size // 2, min_chunk_size) # node refused the range, try a smaller one
+            print(f'get_logs failed for blocks {start}-{end}, retrying with chunk size {size} - {e}')
+            continue
+        logs = sorted(logs, key=lambda log: (log['blockNumber'], log['logIndex']))
+        yield from logs
+        start = end + 1
+        if size < chunk_size:
+            size = min(size * 2, chunk_size) # ranges that worked, grow back toward the configured size
@@ -0,0 +1,136 @@
+'''
+### TLDR:
+EIP-1559 fee engine for batched payouts (team / funders transfers in deploy-all, or any big batch of GTC transfers).
+
+Instead of one fixed network.gas_price() for every transaction, fees are estimated from recent blocks:
+    - priority fee: a percentile of the tips paid in the last <history_blocks> blocks
+    - max fee: the pending base fee grown by the worst case 12.5% per block for <target_blocks>, plus the tip
+Batches are sized so our own gas fits in part of the block gas target over <target_blocks>, and
+transactions that sit in the mempool past their target are replaced with bumped fees (>= 12.5%,
+above the 10% nodes require for a replacement), up to MAX_FEE.
+
+The fee data comes from a history source, so the engine can be driven by a live node (ChainFeeHistory)
+or by a scripted base-fee curve on a local chain / in tests (ScriptedFeeHistory).
+'''
+
+GWEI = 10**9
+BASE_FEE_MAX_CHANGE = 1.125 # EIP-1559: base fee moves at most 12.5% per block
+REPLACEMENT_BUMP = 1.125 # geth/nethermind want >= 10% on both fees to accept a replacement
+
+class FeeCapExceeded(Exception):
+    pass
+
+class FeeHistory:
+    '''eth_feeHistory result, as plain ints'''
+    def __init__(self, base_fees, gas_used_ratios, rewards, gas_limit):
+        self.base_fees = base_fees # one per block plus the pending block, pending last
+        self.gas_used_ratios = gas_used_ratios
+        self.rewards = rewards # per block, one tip per requested percentile
+        self.gas_limit = gas_limit
+
+    @property
+    def pending_base_fee(self):
+        return self.base_fees[-1]
+
+def _int(value):
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+class ChainFeeHistory:
+    '''fee history from a live node through eth_feeHistory'''
+    def __init__(self, web3):
+        self.web3 = web3
+
+    def fetch(self, block_count, percentiles):
+        result = self.web3.manager.request_blocking('eth_feeHistory', [hex(block_count), 'latest', percentiles])
+        gas_limit = self.web3.eth.get_block('latest')['gasLimit']
+        return FeeHistory(
+            [_int(fee) for fee in result['baseFeePerGas']],
+            list(result['gasUsedRatio']),
+            [[_int(tip) for tip in block] for block in result.get('reward', [])],
+            gas_limit,
+        )
+
+    def block_number(self):
+        return self.web3.eth.block_number
+
+class ScriptedFeeHistory:
+    '''
+        Replays a scripted base fee curve, for local chains and tests.
+        <base_fees> is one base fee per block; advance() moves to the next block.
+    '''
+    def __init__(self, base_fees, tip=2 * GWEI, gas_used_ratio=0.5, gas_limit=30_000_000):
+        self.base_fees = list(base_fees)
+        self.tip = tip
+        self.gas_used_ratio = gas_used_ratio
+        self.gas_limit = gas_limit
+        self.block = 0
+
+    def advance(self, blocks=1):
+        self.block = min(self.block + blocks, len(self.base_fees) - 1)
+
+    def fetch(self, block_count, percentiles):
+        first = max(0, self.block - block_count + 1)
+        blocks = self.block - first + 1
+        pending = self.base_fees[min(self.block + 1, len(self.base_fees) - 1)]
+        return FeeHistory(
+            self.base_fees[first:self.block + 1] + [pending],
+            [self.gas_used_ratio] * blocks,
+            [[self.tip] * len(percentiles) for _ in range(blocks)],
+            self.gas_limit,
+        )
+
+    def block_number(self):
+        return self.block
+
+class FeeEngine:
+    def __init__(self, history, target_blocks=3, history_blocks=20, priority_percentile=50, min_priority_fee=1 * GWEI, max_fee=None, block_share=0.25):
+        self.history = history
+        self.target_blocks = target_blocks
+        self.history_blocks = history_blocks
+        self.priority_percentile = priority_percentile
+        self.min_priority_fee = min_priority_fee
+        self.max_fee = max_fee # hard cap on max_fee, in wei
+        self.block_share = block_share # part of each block's gas target our batch may take
+
+    def _history(self):
+        return self.history.fetch(self.history_blocks, [self.priority_percentile])
+
+    def priority_fee(self, history=None):
+        '''median of the chosen tip percentile over recent blocks (empty blocks ignored)'''
+        history = history or self._history()
+        tips = sorted(block[0] for block in history.rewards if block and block[0] > 0)
+        if not tips:
+            return self.min_priority_fee
+        return max(tips[len(tips) // 2], self.min_priority_fee)
+
+    def estimate(self, target_blocks=None):
+        '''{'max_fee', 'priority_fee'} that should get a tx in within <target_blocks> even if every block is full'''
+        target_blocks = target_blocks or self.target_blocks
+        history = self._history()
+        priority_fee = self.priority_fee(history)
+        base_fee = int(history.pending_base_fee * BASE_FEE_MAX_CHANGE ** max(target_blocks - 1, 0))
+        max_fee = base_fee + priority_fee
+        if self.max_fee is not None:
+            if priority_fee > self.max_fee:
+                raise FeeCapExceeded(f'priority fee {priority_fee / GWEI:.2f} gwei is above MAX_FEE')
+            max_fee = min(max_fee, self.max_fee)
+        return {'max_fee': max_fee, 'priority_fee': priority_fee}
+
+    def bump(self, fees):
+        '''replacement fees for a stuck tx: at least REPLACEMENT_BUMP over the old ones, and no less than a fresh estimate'''
+        current = self.estimate()
+        priority_fee = max(int(fees['priority_fee'] * REPLACEMENT_BUMP) + 1, current['priority_fee'])
+        max_fee = max(int(fees['max_fee'] * REPLACEMENT_BUMP) + 1, current['max_fee'], priority_fee)
+        if self.max_fee is not None and max_fee > self.max_fee:
+            raise FeeCapExceeded(f'replacement needs max fee {max_fee / GWEI:.2f} gwei, above MAX_FEE {self.max_fee / GWEI:.2f} gwei')
+        return {'max_fee': max_fee, 'priority_fee': priority_fee}
+
+    def batch_size(self, gas_per_tx, target_blocks=None):
+        '''how many txs of <gas_per_tx> to keep in flight so they all fit in <target_blocks> without crowding the block'''
+        target_blocks = target_blocks or self.target_blocks
+        history = self._history()
+        gas_target = history.gas_limit // 2 # EIP-1559 target is half the limit
+        return max(1, int(gas_target * self.block_share * target_blocks // gas_per_tx))
+
+    def block_number(self):
+        return self.history.block_number()
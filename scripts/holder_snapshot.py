@@ -0,0 +1,228 @@
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import requests
+
+if __name__ == '__main__': # run from plain python, make scripts.* importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.delegation_graph import fetch_events, read_events, TRANSFER
+from scripts.event_stream import connect, ZERO_ADDRESS
+from scripts.merkle_tree import MerkleTree, leaf_hash
+
+'''
+### TLDR:
+Holder snapshot -> distribution csv + MERKLE_ROOT for a future GTC distribution round.
+
+1) every GTC balance at --block is rebuilt by streaming Transfer events in chunks into an in-memory
+   balance table (one int per holder - no per-address archive calls)
+2) eligibility rules drop holders (min balance, excluded addresses such as the TokenDistributor,
+   Timelock or TreasuryVester, optionally any contract - checked with batched eth_getCode calls at the
+   latest block, see contract_addresses())
+3) a weighting rule (linear / sqrt / capped) splits --total GTC between the eligible holders, in wei,
+   adding up exactly to the total
+4) one streaming pass writes the dist csv (same columns the tests read: user_id in column 2,
+   total_claim in column 3), the leaf hashes and the merkle node file; the root is printed
+
+from terminal:
+`python scripts/holder_snapshot.py <gtc_address> --from-block 12422079 --block 13000000 --total 1000000 --out round2 --rules round2_rules.json`
+
+rules json (all optional):
+{"min_balance": 1, "exclude": ["0x..."], "exclude_contracts": true, "weighting": "sqrt", "cap": 50000, "first_user_id": 1}
+min_balance & cap are in GTC. exclude_contracts reads code at the latest block (a full node will do) in batches of
+CODE_BATCH_SIZE calls, so ~2k HTTP requests for a million eligible holders.
+
+Writes round2.csv, round2.leaves (one leaf hash per line, same order as the csv) and round2.nodes
+(node file for scripts/merkle_tree.py & scripts/proof_bundles.py). With --events-file the Transfer events
+are read from / appended to the same cache scripts/delegation_graph.py uses.
+'''
+
+MAX_USER_ID = 2**32 - 1 # claimTokens() takes a uint32 user_id
+CODE_BATCH_SIZE = 500 # eth_getCode calls per JSON-RPC batch request
+
+DEFAULT_RULES = {
+    'min_balance': 0,
+    'exclude': [],
+    'exclude_contracts': False,
+    'weighting': 'linear',
+    'cap': None,
+    'first_user_id': 1,
+}
+
+def stream_transfers(gtc_address, from_block, to_block, events_file=None):
+    '''
+        Transfer events up to <to_block>, one at a time - from the local cache first, then the node.
+        Newly fetched events are appended to the cache as they stream past.
+    '''
+    last_block = from_block - 1
+    if events_file and os.path.exists(events_file):
+        for event in read_events(events_file):
+            last_block = max(last_block, event[0])
+            if event[0] <= to_block and event[2] == TRANSFER:
+                yield event
+    if last_block >= to_block:
+        return
+
+    web3 = connect()
+    cache = open(events_file, 'a', newline='') if events_file else None
+    try:
+        writer = csv.writer(cache) if cache else None
+        for event in fetch_events(web3, gtc_address, last_block + 1, to_block):
+            if writer:
+                writer.writerow(event)
+            if event[2] == TRANSFER:
+                yield event
+    finally:
+        if cache:
+            cache.close()
+
+def balances_at(transfers):
+    '''address -> balance (wei) after applying <transfers> in order'''
+    balances = {}
+    for _, _, _, src, dst, amount in transfers:
+        if src != ZERO_ADDRESS:
+            balances[src] = balances.get(src, 0) - amount
+        if dst != ZERO_ADDRESS:
+            balances[dst] = balances.get(dst, 0) + amount
+    return balances
+
+def contract_addresses(endpoint_uri, addresses, batch_size=CODE_BATCH_SIZE):
+    '''
+        the subset of <addresses> that have code, <batch_size> eth_getCode calls per HTTP request.
+        Checked at the latest block, not the snapshot block: historical code needs an archive node and one
+        call per holder, which is millions of round trips for a full holder list. The trade off is that an
+        address given code after the snapshot (e.g. CREATE2) counts as a contract, one selfdestructed since doesn't.
+    '''
+    contracts = set()
+    session = requests.Session()
+    for start in range(0, len(addresses), batch_size):
+        chunk = addresses[start:start + batch_size]
+        batch = [{'jsonrpc': '2.0', 'id': i, 'method': 'eth_getCode', 'params': [address, 'latest']} for i, address in enumerate(chunk)]
+        response = session.post(endpoint_uri, json=batch, timeout=120)
+        response.raise_for_status()
+        results = response.json()
+        if not isinstance(results, list): # node doesn't take batches, or refused this one
+            raise ValueError(f'eth_getCode batch refused - {results.get("error", results)}')
+        for result in results:
+            if 'error' in result:
+                raise ValueError(f'eth_getCode {chunk[result["id"]]} failed - {result["error"]}')
+            if result['result'] not in ('0x', None):
+                contracts.add(chunk[result['id']])
+    return contracts
+
+def eligible(balances, rules, find_contracts=None):
+    '''
+        sorted [(address, balance)] passing the eligibility rules.
+        find_contracts(addresses) returns the ones that are contracts, only asked about holders passing the other rules.
+    '''
+    min_balance = int(rules['min_balance'] * 10**18)
+    excluded = {address.lower() for address in rules['exclude']}
+    holders = sorted((address, balance) for address, balance in balances.items()
+        if balance > 0 and balance >= min_balance and address not in excluded)
+    if rules['exclude_contracts'] and find_contracts is not None:
+        contracts = find_contracts([address for address, _ in holders])
+        holders = [(address, balance) for address, balance in holders if address not in contracts]
+    return holders
+
+def weight(balance, rules):
+    if rules['weighting'] == 'linear':
+        return balance
+    if rules['weighting'] == 'sqrt':
+        return math.isqrt(balance)
+    if rules['weighting'] == 'capped':
+        return min(balance, int(rules['cap'] * 10**18))
+    raise ValueError(f'unknown weighting rule: {rules["weighting"]}')
+
+def allocate(holders, total, rules):
+    '''
+        yield (address, amount in wei) splitting <total> wei by weight. Floors first, then the leftover
+        wei go one each to the largest remainders so the amounts add up to exactly <total>.
+    '''
+    weights = [weight(balance, rules) for _, balance in holders]
+    total_weight = sum(weights)
+    if total_weight == 0:
+        raise ValueError('no eligible holders')
+    floors = [total * w // total_weight for w in weights]
+    leftover = total - sum(floors)
+    by_remainder = sorted(range(len(holders)), key=lambda i: (total * weights[i]) % total_weight, reverse=True)
+    for i in by_remainder[:leftover]:
+        floors[i] += 1
+    for (address, _), amount in zip(holders, floors):
+        if amount > 0:
+            yield address, amount
+
+def write_distribution(out, allocations, count, first_user_id):
+    '''single pass: dist csv row, leaf hash & merkle leaf for each allocation. Returns the root.'''
+    if first_user_id + count - 1 > MAX_USER_ID:
+        raise ValueError('user ids would overflow uint32')
+
+    def rows():
+        with open(f'{out}.csv', 'w', newline='') as csvfile, open(f'{out}.leaves', 'w') as leaves_file:
+            writer = csv.writer(csvfile)
+            writer.writerow(['address', 'user_id', 'total_claim'])
+            for user_id, (address, amount) in enumerate(allocations, start=first_user_id):
+                leaf = leaf_hash(user_id, amount)
+                writer.writerow([address, user_id, amount])
+                leaves_file.write('0x' + leaf.hex() + '\n')
+                yield leaf
+
+    tree = MerkleTree.create(f'{out}.nodes', rows(), count=count)
+    root = tree.root()
+    tree.close()
+    return root
+
+def load_rules(path):
+    rules = dict(DEFAULT_RULES)
+    if path:
+        with open(path, 'r') as f:
+            rules.update(json.load(f))
+    if rules['weighting'] == 'capped' and rules['cap'] is None:
+        raise ValueError('weighting "capped" needs a cap')
+    return rules
+
+def main():
+    parser = argparse.ArgumentParser(description='GTC holder snapshot -> distribution csv & merkle root')
+    parser.add_argument('gtc_address')
+    parser.add_argument('--from-block', type=int, required=True, help='GTC deploy block')
+    parser.add_argument('--block', type=int, required=True, help='snapshot block')
+    parser.add_argument('--total', type=int, required=True, help='GTC to distribute in this round')
+    parser.add_argument('--out', required=True, help='output prefix, writes <out>.csv, <out>.leaves & <out>.nodes')
+    parser.add_argument('--rules', help='eligibility & weighting rules json')
+    parser.add_argument('--events-file', help='local csv cache of decoded GTC events')
+    args = parser.parse_args()
+
+    try:
+        rules = load_rules(args.rules)
+    except Exception as e:
+        print(f'Unable to load rules from {args.rules} - {e}')
+        sys.exit(1)
+
+    balances = balances_at(stream_transfers(args.gtc_address, args.from_block, args.block, args.events_file))
+    print(f'{len(balances)} addresses seen up to block {args.block}')
+
+    find_contracts = None
+    if rules['exclude_contracts']:
+        endpoint_uri = connect().provider.endpoint_uri
+        find_contracts = lambda addresses: contract_addresses(endpoint_uri, addresses)
+    try:
+        holders = eligible(balances, rules, find_contracts)
+    except (ValueError, requests.RequestException) as e:
+        print(f'Unable to check holders for contract code - {e}')
+        sys.exit(1)
+    del balances
+    print(f'{len(holders)} eligible holders')
+
+    try:
+        allocations = list(allocate(holders, args.total * 10**18, rules))
+        root = write_distribution(args.out, iter(allocations), len(allocations), rules['first_user_id'])
+    except ValueError as e:
+        print(f'Unable to build distribution - {e}')
+        sys.exit(1)
+    print(f'{len(allocations)} claims written to {args.out}.csv')
+    print(f'MERKLE_ROOT: 0x{root.hex()}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+import csv
+import mmap
+import os
+import struct
+import sys
+import argparse
+import json
+from eth_utils import keccak
+
+'''
+### TLDR:
+Incremental merkle tree for the TokenDistributor initial distribution.
+
+Every level of the tree is stored in a flat, memory-mapped file of 32 byte nodes (the "node file").
+When rows of the distribution are added or amended, only the paths from the touched leaves up to
+the root are re-hashed, so a handful of edits on a 500k leaf tree takes milliseconds instead of a full rebuild.
+
+The tree matches what TokenDistributor.claimTokens() verifies:
+    leaf = keccak256(abi.encode(keccak256(abi.encode(user_id, user_amount))))
+    parent = keccak256(abi.encodePacked(min(a, b), max(a, b)))   # OpenZeppelin MerkleProof, sorted pairs
+An odd node at the end of a level is promoted to the next level unchanged.
+
+from terminal:
+
+1) first build (or full rebuild) of the node file:
+`python scripts/merkle_tree.py ./tests/initial_dist.csv ./scripts/initial_dist.nodes --rebuild`
+
+2) after amending / appending rows of the dist csv, pass the rows you touched (0 = first row after the header)
+   so only those rows are hashed & only their paths re-hashed, then dump the proofs that changed:
+`python scripts/merkle_tree.py ./tests/initial_dist.csv ./scripts/initial_dist.nodes --rows 17,42,500000-500009 --proofs-out changed_proofs.json`
+
+   without --rows every row is re-hashed and compared against the node file to find the changes,
+   which is O(rows) - about as slow as a rebuild, but safe when you don't know what changed.
+
+The printed root is the MERKLE_ROOT used when deploying TokenDistributor.
+'''
+
+NODE_SIZE = 32
+HEADER_SIZE = 64
+MAGIC = b'GTCMRKL1'
+
+def leaf_hash(user_id, user_amount):
+    '''leaf hash for a claim, same as TokenDistributor: keccak256(abi.encode(keccak256(abi.encode(user_id, user_amount))))'''
+    inner = keccak(int(user_id).to_bytes(32, 'big') + int(user_amount).to_bytes(32, 'big'))
+    return keccak(inner)
+
+def hash_pair(a, b):
+    '''OpenZeppelin MerkleProof style parent hash - pair is sorted before hashing'''
+    if a <= b:
+        return keccak(a + b)
+    return keccak(b + a)
+
+def verify_proof(proof, root, leaf):
+    '''python port of MerkleProof.verify(), handy to sanity check proofs before handing them out'''
+    computed = leaf
+    for element in proof:
+        computed = hash_pair(computed, element)
+    return computed == root
+
+def level_sizes(count):
+    '''number of nodes on each level of a tree with <count> leaves, leaves first, root last'''
+    sizes = [count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+class MerkleTree:
+    '''
+        Merkle tree backed by a memory-mapped node file.
+        File layout: 64 byte header (magic, leaf count, leaf capacity) followed by every level of
+        a <capacity> leaf tree, leaves first. Unused slots past the leaf count are left as zero bytes.
+    '''
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self.count, self.capacity = struct.unpack_from('<8sQQ', self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f'{path} does not appear to be a merkle node file')
+        self._offsets = self._level_offsets(self.capacity)
+
+    @classmethod
+    def create(cls, path, leaves, capacity=None, count=None):
+        '''
+            write a new node file for <leaves> and hash every level - this is the full rebuild.
+            <leaves> can be any iterable; pass <count> with a generator so it's streamed straight into the file.
+        '''
+        if count is None:
+            leaves = list(leaves)
+            count = len(leaves)
+        if capacity is None:
+            capacity = 1
+            while capacity < count * 2: # leave room to append rows without relaying out the file
+                capacity *= 2
+        if capacity < count:
+            raise ValueError('capacity must be >= number of leaves')
+
+        size = HEADER_SIZE + sum(level_sizes(capacity)) * NODE_SIZE
+        with open(path, 'wb') as f:
+            f.write(struct.pack('<8sQQ', MAGIC, 0, capacity).ljust(HEADER_SIZE, b'\0'))
+            f.truncate(size)
+
+        tree = cls(path)
+        written = 0
+        for leaf in leaves:
+            if written == count:
+                raise ValueError(f'more than {count} leaves given')
+            tree._set_node(0, written, leaf)
+            written += 1
+        if written != count:
+            raise ValueError(f'expected {count} leaves, got {written}')
+        tree._set_count(count)
+        tree._rehash_all()
+        return tree
+
+    @staticmethod
+    def _level_offsets(capacity):
+        offsets = []
+        offset = HEADER_SIZE
+        for size in level_sizes(capacity):
+            offsets.append(offset)
+            offset += size * NODE_SIZE
+        return offsets
+
+    def _set_count(self, count):
+        self.count = count
+        struct.pack_into('<Q', self._map, 8, count)
+
+    def node(self, level, index):
+        '''32 byte node at (level, index), level 0 being the leaves'''
+        start = self._offsets[level] + index * NODE_SIZE
+        return self._map[start:start + NODE_SIZE]
+
+    def _set_node(self, level, index, value):
+        start = self._offsets[level] + index * NODE_SIZE
+        self._map[start:start + NODE_SIZE] = value
+
+    def _hash_parent(self, level, parent, size):
+        '''(re)compute node <parent> on level+1 from its children on <level> (which has <size> nodes)'''
+        left = parent * 2
+        if left + 1 < size:
+            value = hash_pair(self.node(level, left), self.node(level, left + 1))
+        else:
+            value = self.node(level, left) # odd node out, promoted as-is
+        self._set_node(level + 1, parent, value)
+
+    def _rehash_all(self):
+        sizes = level_sizes(self.count)
+        for level, size in enumerate(sizes[:-1]):
+            for parent in range(sizes[level + 1]):
+                self._hash_parent(level, parent, size)
+
+    def leaf(self, index):
+        return self.node(0, index)
+
+    def root(self):
+        if self.count == 0:
+            return b'\0' * NODE_SIZE
+        return self.node(len(level_sizes(self.count)) - 1, 0)
+
+    def proof(self, index):
+        '''list of sibling hashes from leaf <index> to the root, as accepted by claimTokens()'''
+        if not 0 <= index < self.count:
+            raise IndexError(f'leaf {index} out of range')
+        proof = []
+        for level, size in enumerate(level_sizes(self.count)[:-1]):
+            sibling = index ^ 1
+            if sibling < size:
+                proof.append(self.node(level, sibling))
+            index //= 2
+        return proof
+
+    def update(self, changes):
+        '''
+            Set/append leaves and re-hash only the affected paths.
+            <changes> maps leaf index -> leaf hash. Indices past the current end append to the tree,
+            but must not leave gaps. Returns an UpdateResult with the new root and stale proof ranges.
+        '''
+        if not changes:
+            return UpdateResult(self.root(), [], [])
+
+        new_count = max(self.count, max(changes) + 1)
+        appended = set(range(self.count, new_count))
+        if not appended.issubset(changes):
+            raise ValueError('appended leaves must be contiguous with the end of the tree')
+        if new_count > self.capacity:
+            return self._grow(changes, new_count)
+
+        for index, value in changes.items():
+            self._set_node(0, index, value)
+        self._set_count(new_count)
+
+        dirty = set(changes)
+        touched = []
+        sizes = level_sizes(new_count)
+        for level, size in enumerate(sizes[:-1]):
+            touched.append(dirty)
+            parents = {index // 2 for index in dirty}
+            for parent in parents:
+                self._hash_parent(level, parent, size)
+            dirty = parents
+
+        self._map.flush()
+        return UpdateResult(self.root(), sorted(changes), self._stale_ranges(changes, touched, new_count))
+
+    def _grow(self, changes, new_count):
+        '''out of capacity - lay the tree out again in a bigger file, this is a full rebuild'''
+        leaves = [self.leaf(i) for i in range(self.count)] + [None] * (new_count - self.count)
+        for index, value in changes.items():
+            leaves[index] = value
+        self.close()
+        tmp_path = f'{self.path}.tmp'
+        MerkleTree.create(tmp_path, leaves).close()
+        os.replace(tmp_path, self.path)
+        self.__init__(self.path)
+        return UpdateResult(self.root(), sorted(changes), [(0, new_count)])
+
+    @staticmethod
+    def _stale_ranges(changes, touched, count):
+        '''
+            A leaf's proof holds the sibling of each node on its path, so every re-hashed node
+            makes the proofs of the leaves under its sibling stale. Leaves that were set/appended
+            need a new claim anyway. Merge all of those into [start, end) ranges.
+        '''
+        ranges = [(index, index + 1) for index in changes]
+        for level, nodes in enumerate(touched):
+            for index in nodes:
+                start = (index ^ 1) << level
+                if start < count:
+                    ranges.append((start, min((start + (1 << level)), count)))
+        ranges.sort()
+        merged = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+class UpdateResult:
+    '''outcome of MerkleTree.update()'''
+    def __init__(self, root, changed_leaves, stale_ranges):
+        self.root = root
+        self.changed_leaves = changed_leaves # leaf indices that were set/appended
+        self.stale_ranges = stale_ranges # [start, end) leaf index ranges whose proofs changed
+
+    def stale_indices(self):
+        for start, end in self.stale_ranges:
+            yield from range(start, end)
+
+def read_dist(dist_file):
+    '''yield (user_id, total_claim) for every row of a dist csv, same columns the tests use'''
+    with open(dist_file, 'r') as csvfile:
+        initial_distribution = csv.reader(csvfile)
+        next(initial_distribution) # skip header
+        for row in initial_distribution:
+            yield int(row[1]), int(row[2])
+
+def read_rows(dist_file, indices):
+    '''
+        {index: (user_id, total_claim)} for just the rows at <indices> (0 = first row after the header).
+        Other lines are skipped without being parsed or hashed.
+    '''
+    wanted = set(indices)
+    rows = {}
+    with open(dist_file, 'r') as csvfile:
+        next(csvfile) # skip header
+        for index, line in enumerate(csvfile):
+            if index in wanted:
+                row = next(csv.reader([line]))
+                rows[index] = (int(row[1]), int(row[2]))
+                if len(rows) == len(wanted):
+                    break
+    missing = wanted - rows.keys()
+    if missing:
+        raise ValueError(f'rows {sorted(missing)[:10]} are past the end of {dist_file}')
+    return rows
+
+def parse_rows(value):
+    '''"17,42,100-120" -> [17, 42, 100, ..., 120]'''
+    indices = []
+    for part in value.split(','):
+        start, _, end = part.strip().partition('-')
+        indices.extend(range(int(start), int(end or start) + 1))
+    return indices
+
+def main():
+    parser = argparse.ArgumentParser(description='incrementally (re)build the merkle tree for a distribution csv')
+    parser.add_argument('dist_file', help='distribution csv - user_id in column 2, total_claim (wei) in column 3')
+    parser.add_argument('node_file', help='memory-mapped node file, created on first run')
+    parser.add_argument('--rebuild', action='store_true', help='ignore any existing node file and hash everything')
+    parser.add_argument('--rows', type=parse_rows, help='rows amended/appended since the last run, e.g. 17,42,100-120 - only these are hashed')
+    parser.add_argument('--proofs-out', help='write {user_id: {leaf, proof}} for every proof that changed to this file')
+    args = parser.parse_args()
+
+    rows = None
+    try:
+        if args.rows is not None and not args.rebuild and os.path.exists(args.node_file):
+            tree = MerkleTree(args.node_file)
+            changes = {index: leaf_hash(user_id, amount) for index, (user_id, amount) in read_rows(args.dist_file, args.rows).items()}
+            result = tree.update(changes)
+        else:
+            rows = list(read_dist(args.dist_file))
+            leaves = [leaf_hash(user_id, amount) for user_id, amount in rows]
+            if args.rebuild or not os.path.exists(args.node_file):
+                tree = MerkleTree.create(args.node_file, leaves)
+                result = UpdateResult(tree.root(), list(range(len(leaves))), [(0, len(leaves))])
+            else:
+                tree = MerkleTree(args.node_file)
+                if len(leaves) < tree.count:
+                    print(f'Distribution has fewer rows than the node file ({len(leaves)} < {tree.count}), doing a full rebuild')
+                    tree.close()
+                    tree = MerkleTree.create(args.node_file, leaves)
+                    result = UpdateResult(tree.root(), list(range(len(leaves))), [(0, len(leaves))])
+                else:
+                    changes = {i: leaf for i, leaf in enumerate(leaves) if i >= tree.count or tree.leaf(i) != leaf}
+                    result = tree.update(changes)
+    except (ValueError, OSError) as e:
+        print(f'Unable to update the merkle tree from {args.dist_file} - {e}')
+        sys.exit(1)
+
+    stale = sum(end - start for start, end in result.stale_ranges)
+    print(f'MERKLE_ROOT: 0x{result.root.hex()}')
+    print(f'leaves: {tree.count}, rows changed: {len(result.changed_leaves)}, proofs changed: {stale}')
+
+    if args.proofs_out:
+        if rows is not None:
+            user_ids = [user_id for user_id, _ in rows]
+        else:
+            user_ids = {index: user_id for index, (user_id, _) in read_rows(args.dist_file, result.stale_indices()).items()}
+        with open(args.proofs_out, 'w') as f:
+            changed = {}
+            for index in result.stale_indices():
+                changed[user_ids[index]] = {
+                    'leaf': '0x' + tree.leaf(index).hex(),
+                    'proof': ['0x' + p.hex() for p in tree.proof(index)],
+                }
+            json.dump(changed, f)
+        print(f'changed proofs written to {args.proofs_out}')
+    tree.close()
+
+if __name__ == '__main__':
+    main()
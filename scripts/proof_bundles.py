@@ -0,0 +1,181 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from multiprocessing import Pool
+
+if __name__ == '__main__': # run from plain python, make scripts.* importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.event_stream import to_bytes
+from scripts.merkle_tree import MerkleTree, leaf_hash, verify_proof, read_dist
+
+'''
+### TLDR:
+Static, sharded proof bundles - every claim's amount, leaf & proof as plain files, no ESMS round trip needed
+to build the claimTokens() arguments (everything except the signature).
+
+Claims are bucketed by the last <digits> hex digits of the zero-padded user_id, so sequential ids spread
+evenly over 16**digits shard files. A client fetches exactly one file:
+
+    shard = user_id.toString(16).padStart(8, '0').slice(-digits)
+    GET <bundle dir>/<shard>.json  ->  {"<user_id>": ["<amount wei>", "<leaf>", ["<proof>", ...]], ...}
+
+manifest.json holds the MERKLE_ROOT, leaf count, shard naming and a sha256 per shard file.
+Every proof is checked against the root before it is written (and the root against --merkle-root, when given),
+and --verify re-checks a bundle directory end to end. Shards are generated in parallel, each worker reading
+proofs straight from the memory-mapped node file built by scripts/merkle_tree.py.
+
+from terminal:
+`python scripts/proof_bundles.py ./tests/initial_dist.csv ./scripts/initial_dist.nodes ./bundles --merkle-root 0x...`
+`python scripts/proof_bundles.py --verify ./bundles`
+'''
+
+MANIFEST = 'manifest.json'
+LEAF_SCHEME = 'keccak256(abi.encode(keccak256(abi.encode(user_id, amount)))), sorted pairs'
+
+def shard_name(user_id, digits):
+    return f'{int(user_id):08x}'[-digits:]
+
+def _sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _write_json(path, data):
+    tmp_file = f'{path}.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_file, path)
+
+_tree = None
+
+def _open_tree(node_file):
+    global _tree
+    _tree = MerkleTree(node_file)
+
+def write_shard(job):
+    '''
+        worker: one shard file from [(index, user_id, amount)].
+        Returns (name, claims, sha256), raises ValueError if the dist and node file disagree.
+    '''
+    out_dir, name, rows, root = job
+    claims = {}
+    for index, user_id, amount in rows:
+        leaf = _tree.leaf(index)
+        if leaf != leaf_hash(user_id, amount):
+            raise ValueError(f'user_id {user_id} (row {index}) does not match leaf {index} of the node file')
+        proof = _tree.proof(index)
+        if not verify_proof(proof, root, leaf):
+            raise ValueError(f'proof for user_id {user_id} does not verify against 0x{root.hex()}')
+        claims[str(user_id)] = [str(amount), '0x' + leaf.hex(), ['0x' + p.hex() for p in proof]]
+    path = os.path.join(out_dir, f'{name}.json')
+    _write_json(path, claims)
+    return name, len(claims), _sha256(path)
+
+def build(dist_file, node_file, out_dir, digits=2, merkle_root=None, processes=None):
+    '''write every shard and the manifest, returns the manifest'''
+    tree = MerkleTree(node_file)
+    root, count = tree.root(), tree.count
+    tree.close()
+    if merkle_root is not None and root != merkle_root:
+        raise ValueError(f'node file root 0x{root.hex()} != MERKLE_ROOT 0x{merkle_root.hex()}')
+
+    shards = {}
+    seen = set()
+    rows = 0
+    for index, (user_id, amount) in enumerate(read_dist(dist_file)):
+        if user_id in seen: # shards are keyed by user_id, a second row would silently overwrite the first claim
+            raise ValueError(f'user_id {user_id} appears more than once in {dist_file} (again at row {index})')
+        seen.add(user_id)
+        shards.setdefault(shard_name(user_id, digits), []).append((index, user_id, amount))
+        rows = index + 1
+    if rows != count:
+        raise ValueError(f'{dist_file} has {rows} rows, node file has {count} leaves - rebuild the node file first')
+
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(out_dir, name, shard_rows, root) for name, shard_rows in sorted(shards.items())]
+    with Pool(processes, initializer=_open_tree, initargs=(node_file,)) as pool:
+        written = pool.map(write_shard, jobs, chunksize=1)
+
+    manifest = {
+        'merkle_root': '0x' + root.hex(),
+        'leaves': count,
+        'leaf': LEAF_SCHEME,
+        'shard_digits': digits,
+        'shards': {name: {'claims': claims, 'sha256': sha256} for name, claims, sha256 in written},
+    }
+    _write_json(os.path.join(out_dir, MANIFEST), manifest)
+    return manifest
+
+def verify_shard(job):
+    '''worker: re-check one shard file against the manifest, returns a list of problems'''
+    out_dir, name, expected, root, digits = job
+    path = os.path.join(out_dir, f'{name}.json')
+    if _sha256(path) != expected['sha256']:
+        return [f'{name}.json: sha256 mismatch']
+    with open(path, 'r') as f:
+        claims = json.load(f)
+    problems = []
+    if len(claims) != expected['claims']:
+        problems.append(f'{name}.json: {len(claims)} claims, manifest says {expected["claims"]}')
+    for user_id, (amount, leaf, proof) in claims.items():
+        leaf = to_bytes(leaf)
+        if shard_name(user_id, digits) != name:
+            problems.append(f'{name}.json: user_id {user_id} is in the wrong shard')
+        elif leaf != leaf_hash(int(user_id), int(amount)):
+            problems.append(f'{name}.json: user_id {user_id} leaf does not match its amount')
+        elif not verify_proof([to_bytes(p) for p in proof], root, leaf):
+            problems.append(f'{name}.json: user_id {user_id} proof does not verify')
+    return problems
+
+def verify(out_dir, merkle_root=None, processes=None):
+    '''every shard hash and every proof in a bundle directory, returns (claims checked, problems)'''
+    with open(os.path.join(out_dir, MANIFEST), 'r') as f:
+        manifest = json.load(f)
+    root = to_bytes(manifest['merkle_root'])
+    problems = []
+    if merkle_root is not None and root != merkle_root:
+        problems.append(f'manifest root {manifest["merkle_root"]} != MERKLE_ROOT 0x{merkle_root.hex()}')
+    jobs = [(out_dir, name, expected, root, manifest['shard_digits']) for name, expected in sorted(manifest['shards'].items())]
+    with Pool(processes) as pool:
+        for shard_problems in pool.map(verify_shard, jobs, chunksize=1):
+            problems.extend(shard_problems)
+    claims = sum(shard['claims'] for shard in manifest['shards'].values())
+    if claims != manifest['leaves']:
+        problems.append(f'{claims} claims in shards, manifest says {manifest["leaves"]} leaves')
+    return claims, problems
+
+def main():
+    parser = argparse.ArgumentParser(description='sharded static proof bundles for a distribution')
+    parser.add_argument('paths', nargs='+', help='<dist_file> <node_file> <out_dir>, or <out_dir> with --verify')
+    parser.add_argument('--digits', type=int, default=2, help='hex digits of user_id per shard name (16**digits shards)')
+    parser.add_argument('--merkle-root', help='MERKLE_ROOT the bundle must match (the deployed TokenDistributor root)')
+    parser.add_argument('--processes', type=int, help='worker processes, defaults to one per cpu')
+    parser.add_argument('--verify', action='store_true', help='re-check an existing bundle directory instead of building one')
+    args = parser.parse_args()
+
+    merkle_root = to_bytes(args.merkle_root) if args.merkle_root else None
+
+    if args.verify:
+        claims, problems = verify(args.paths[0], merkle_root, args.processes)
+        for problem in problems:
+            print(problem)
+        print(f'{claims} claims checked, {len(problems)} problems')
+        sys.exit(1 if problems else 0)
+
+    if len(args.paths) != 3:
+        parser.error('expected <dist_file> <node_file> <out_dir>')
+    if not 1 <= args.digits <= 8:
+        parser.error('--digits must be between 1 and 8')
+    dist_file, node_file, out_dir = args.paths
+    try:
+        manifest = build(dist_file, node_file, out_dir, args.digits, merkle_root, args.processes)
+    except (ValueError, OSError) as e:
+        print(f'Unable to build proof bundles - {e}')
+        sys.exit(1)
+    print(f'MERKLE_ROOT: {manifest["merkle_root"]}')
+    print(f'{manifest["leaves"]} claims written to {len(manifest["shards"])} shards in {out_dir}')
+
+if __name__ == '__main__':
+    main()
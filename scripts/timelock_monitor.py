@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import sys
+import time
+from eth_utils import keccak
+
+if __name__ == '__main__': # run from plain python, make scripts.* importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.event_stream import connect, event_topic, stream_logs, to_bytes, topic_to_address, data_words, word_to_int
+
+'''
+### TLDR:
+Watch Timelock queued transactions across every GovernorAlpha proposal.
+
+Timelock keys queuedTransactions by keccak256(abi.encode(target, value, signature, data, eta)).
+The monitor computes those hashes locally from getActions(proposalId) when a proposal is queued
+(one call per proposal, not one per hash), then keeps an index of every action up to date from
+QueueTransaction / ExecuteTransaction / CancelTransaction events - only new blocks are read on each pass.
+
+Each action is one of:
+    queued      - eta not reached yet
+    executable  - eta <= now <= eta + GRACE_PERIOD
+    expired     - past eta + GRACE_PERIOD without being executed (Timelock will reject it as stale)
+    executed / cancelled
+
+from terminal:
+`python scripts/timelock_monitor.py <timelock_address> <governor_address> --from-block 12422079 --state-file timelock_state.json`
+`python scripts/timelock_monitor.py <timelock_address> <governor_address> --state-file timelock_state.json --watch 60 --warn-hours 48`
+'''
+
+GRACE_PERIOD = 14 * 24 * 60 * 60 # Timelock.sol - 14 days
+
+QUEUE_TOPIC = event_topic('QueueTransaction(bytes32,address,uint256,string,bytes,uint256)')
+EXECUTE_TOPIC = event_topic('ExecuteTransaction(bytes32,address,uint256,string,bytes,uint256)')
+CANCEL_TOPIC = event_topic('CancelTransaction(bytes32,address,uint256,string,bytes,uint256)')
+PROPOSAL_QUEUED_TOPIC = event_topic('ProposalQueued(uint256,uint256)')
+
+GRACE_PERIOD_ABI = [{
+    'name': 'GRACE_PERIOD', 'type': 'function', 'stateMutability': 'view',
+    'inputs': [], 'outputs': [{'name': '', 'type': 'uint256'}],
+}]
+
+GET_ACTIONS_ABI = [{
+    'name': 'getActions', 'type': 'function', 'stateMutability': 'view',
+    'inputs': [{'name': 'proposalId', 'type': 'uint256'}],
+    'outputs': [
+        {'name': 'targets', 'type': 'address[]'},
+        {'name': 'values', 'type': 'uint256[]'},
+        {'name': 'signatures', 'type': 'string[]'},
+        {'name': 'calldatas', 'type': 'bytes[]'},
+    ],
+}]
+
+def _pad(raw):
+    return raw + b'\0' * (-len(raw) % 32)
+
+def _word(value):
+    return int(value).to_bytes(32, 'big')
+
+def timelock_tx_hash(target, value, signature, data, eta):
+    '''keccak256(abi.encode(target, value, signature, data, eta)) - same as Timelock.queueTransaction()'''
+    signature = signature.encode()
+    head_size = 5 * 32
+    signature_tail = _word(len(signature)) + _pad(signature)
+    encoded = (
+        bytes(12) + to_bytes(target)
+        + _word(value)
+        + _word(head_size) # offset to signature
+        + _word(head_size + len(signature_tail)) # offset to data
+        + _word(eta)
+        + signature_tail
+        + _word(len(data)) + _pad(data)
+    )
+    return '0x' + keccak(encoded).hex()
+
+def _decode_dynamic(raw, offset):
+    length = word_to_int(raw[offset:offset + 32])
+    return raw[offset + 32:offset + 32 + length]
+
+def decode_timelock_event(log):
+    '''(tx_hash, target, value, signature, data, eta) from a Queue/Execute/CancelTransaction log'''
+    raw = to_bytes(log['data'])
+    words = data_words(raw)
+    value = word_to_int(words[0])
+    signature = _decode_dynamic(raw, word_to_int(words[1])).decode()
+    data = _decode_dynamic(raw, word_to_int(words[2]))
+    eta = word_to_int(words[3])
+    return '0x' + to_bytes(log['topics'][1]).hex(), topic_to_address(log['topics'][2]), value, signature, data, eta
+
+class QueueIndex:
+    '''every Timelock action we know about, keyed by tx hash, plus the last block read'''
+    def __init__(self, last_block=0, actions=None):
+        self.last_block = last_block
+        self.actions = actions or {}
+
+    @classmethod
+    def load(cls, state_file, from_block):
+        if state_file and os.path.exists(state_file):
+            with open(state_file, 'r') as f:
+                state = json.load(f)
+            return cls(state['last_block'], state['actions'])
+        return cls(from_block - 1)
+
+    def save(self, state_file):
+        tmp_file = f'{state_file}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'last_block': self.last_block, 'actions': self.actions}, f)
+        os.replace(tmp_file, state_file)
+
+    def _action(self, tx_hash, target, value, signature, data, eta, proposal_id=None):
+        action = self.actions.setdefault(tx_hash, {
+            'proposal_id': proposal_id, 'target': target, 'value': value, 'signature': signature,
+            'data': '0x' + data.hex(), 'eta': eta, 'queued': False, 'outcome': None,
+        })
+        if proposal_id is not None:
+            action['proposal_id'] = proposal_id
+        return action
+
+    def add_proposal(self, proposal_id, eta, actions):
+        '''expected hashes for a queued proposal, computed locally from getActions()'''
+        for target, value, signature, data in zip(*actions):
+            data = to_bytes(data)
+            tx_hash = timelock_tx_hash(target, value, signature, data, eta)
+            self._action(tx_hash, target.lower(), value, signature, data, eta, proposal_id)
+
+    def apply_log(self, log):
+        topic0 = '0x' + to_bytes(log['topics'][0]).hex()
+        tx_hash, target, value, signature, data, eta = decode_timelock_event(log)
+        action = self._action(tx_hash, target, value, signature, data, eta)
+        if topic0 == QUEUE_TOPIC:
+            action['queued'] = True
+        elif topic0 == EXECUTE_TOPIC:
+            action['outcome'] = 'executed'
+        elif topic0 == CANCEL_TOPIC:
+            action['outcome'] = 'cancelled'
+
+    def status(self, action, now, grace_period=GRACE_PERIOD):
+        if action['outcome']:
+            return action['outcome']
+        if not action['queued']:
+            return 'not queued' # computed from getActions() but no QueueTransaction seen (yet)
+        if now < action['eta']:
+            return 'queued'
+        if now <= action['eta'] + grace_period:
+            return 'executable'
+        return 'expired'
+
+def update(web3, index, timelock_address, governor_address, to_block):
+    '''read only the blocks since the last pass and fold them into the index'''
+    from_block = index.last_block + 1
+    if from_block > to_block:
+        return 0
+    governor = web3.eth.contract(address=web3.toChecksumAddress(governor_address), abi=GET_ACTIONS_ABI)
+
+    count = 0
+    for log in stream_logs(web3, governor_address, [[PROPOSAL_QUEUED_TOPIC]], from_block, to_block):
+        words = data_words(log['data'])
+        proposal_id, eta = word_to_int(words[0]), word_to_int(words[1])
+        actions = governor.functions.getActions(proposal_id).call() # fixed at propose(), latest state works on a full node
+        index.add_proposal(proposal_id, eta, actions)
+        count += 1
+
+    for log in stream_logs(web3, timelock_address, [[QUEUE_TOPIC, EXECUTE_TOPIC, CANCEL_TOPIC]], from_block, to_block):
+        index.apply_log(log)
+        count += 1
+
+    index.last_block = to_block
+    return count
+
+def report(index, now, warn_seconds, grace_period=GRACE_PERIOD):
+    counts = {}
+    expiring = []
+    for tx_hash, action in index.actions.items():
+        status = index.status(action, now, grace_period)
+        counts[status] = counts.get(status, 0) + 1
+        if status in ('queued', 'executable') and action['eta'] + grace_period - now <= warn_seconds:
+            expiring.append((action['eta'] + grace_period, tx_hash, action))
+
+    print(f'\nTimelock actions at block {index.last_block}: ' + ', '.join(f'{status}: {n}' for status, n in sorted(counts.items())))
+    for stale_at, tx_hash, action in sorted(expiring):
+        hours = (stale_at - now) / 3600
+        print(f'  EXPIRING in {hours:.1f}h - proposal {action["proposal_id"]} {action["signature"]} on {action["target"]} ({tx_hash})')
+    for tx_hash, action in index.actions.items():
+        if index.status(action, now, grace_period) == 'not queued':
+            print(f'  WARNING proposal {action["proposal_id"]} action {action["signature"]} ({tx_hash}) has no QueueTransaction event')
+
+def main():
+    parser = argparse.ArgumentParser(description='monitor Timelock queued transactions')
+    parser.add_argument('timelock_address')
+    parser.add_argument('governor_address')
+    parser.add_argument('--from-block', type=int, default=0, help='deploy block, only used on the first run')
+    parser.add_argument('--state-file', default='timelock_state.json', help='index is kept here between runs')
+    parser.add_argument('--warn-hours', type=float, default=48, help='flag actions going stale within this many hours')
+    parser.add_argument('--confirmations', type=int, default=5, help='stay this many blocks behind head to ride out reorgs')
+    parser.add_argument('--watch', type=int, help='keep running, checking for new blocks every <n> seconds')
+    args = parser.parse_args()
+
+    web3 = connect()
+    index = QueueIndex.load(args.state_file, args.from_block)
+    timelock = web3.eth.contract(address=web3.toChecksumAddress(args.timelock_address), abi=GRACE_PERIOD_ABI)
+    grace_period = timelock.functions.GRACE_PERIOD().call()
+
+    while True:
+        head = web3.eth.block_number - args.confirmations
+        try:
+            update(web3, index, args.timelock_address, args.governor_address, head)
+        except Exception as e:
+            print(f'Unable to read Timelock/GovernorAlpha events - {e}')
+            sys.exit(1)
+        index.save(args.state_file)
+        now = web3.eth.get_block(head)['timestamp']
+        report(index, now, args.warn_hours * 3600, grace_period)
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+import time
+
+'''
+### TLDR:
+Dependency aware transaction scheduler for brownie scripts.
+
+Each Step sends exactly one transaction and names the steps it depends on. The scheduler sends every
+step whose dependencies are confirmed straight away (with required_confs=0, so brownie returns without
+waiting), then tracks all in-flight hashes in a single polling loop until each has <confirmations> blocks
+on top of it. Wall clock time is set by the depth of the dependency graph, not the number of transactions.
+
+With a fee engine (scripts/fee_strategy.py) every tx is sent with estimated EIP-1559 fees, at most
+<max_in_flight> steps are in the mempool at once, and a tx still pending <stuck_blocks> blocks after it was
+sent is replaced with bumped fees on the same nonce.
+
+Dropped transactions (no longer known to the node, nonce still unused) are re-broadcast with the same nonce.
+A nonce that gets used by a transaction we did not send is reported as replaced and fails the step -
+we cannot tell whether the replacement did the same thing, so resending could e.g. pay a transfer twice.
+
+usage (inside a brownie script):
+
+    scheduler = TxScheduler(web3, confirmations=2)
+    scheduler.add(Step('GTC', lambda results, tx: GTC.deploy(..., {'from': DEPLOY_FROM, **tx}), resolve=deployed(GTC)))
+    scheduler.add(Step('setMinter', lambda results, tx: results['GTC'].setMinter(..., {'from': HOPPER_ADDRESS, **tx}), deps=['GTC']))
+    results = scheduler.run()
+'''
+
+class StepFailed(Exception):
+    def __init__(self, step, message):
+        super().__init__(f'{step}: {message}')
+        self.step = step
+
+class Step:
+    '''
+        One transaction in the plan.
+        submit(results, tx_params) sends the tx and returns a pending brownie TransactionReceipt
+        (anything with txid, sender and nonce). <tx_params> must be merged into the tx dict - it carries
+        required_confs=0 and, when re-broadcasting, the nonce to re-use.
+        resolve(results, receipt) turns the confirmed receipt into the value stored in results[name]. <receipt> is the
+        web3 receipt of the mined hash - brownie only fills in its own pending receipt (e.g. contract_address)
+        from a background thread, which can still be behind when the scheduler sees the tx confirmed.
+        Without a resolve, results[name] is the brownie receipt returned by submit().
+    '''
+    def __init__(self, name, submit, deps=(), resolve=None, describe=''):
+        self.name = name
+        self.submit = submit
+        self.deps = list(deps)
+        self.resolve = resolve
+        self.describe = describe
+
+def deployed(container):
+    '''resolve helper for deploy steps - confirmed receipt -> contract object'''
+    def resolve(results, receipt):
+        return container.at(receipt['contractAddress'])
+    return resolve
+
+def dependency_waves(steps):
+    '''group steps by dependency depth, raises ValueError on cycles or unknown deps'''
+    steps = {step.name: step for step in steps}
+    depth = {}
+    def visit(name, path):
+        if name in depth:
+            return depth[name]
+        if name in path:
+            raise ValueError(f'dependency cycle: {" -> ".join(path + [name])}')
+        if name not in steps:
+            raise ValueError(f'{path[-1]} depends on unknown step {name}')
+        depth[name] = 1 + max((visit(dep, path + [name]) for dep in steps[name].deps), default=-1)
+        return depth[name]
+
+    for name in steps:
+        visit(name, [])
+    waves = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for name, step in steps.items(): # keep insertion order within a wave
+        waves[depth[name]].append(step)
+    return waves
+
+class InFlight:
+    '''a sent step, all hashes broadcast for its nonce and when the node last knew about any of them'''
+    def __init__(self, step, receipt, fees, sent_block):
+        self.step = step
+        self.sender = str(receipt.sender)
+        self.nonce = receipt.nonce
+        self.hashes = [receipt.txid]
+        self.receipt = receipt
+        self.receipts = {receipt.txid: receipt}
+        self.last_seen = time.time()
+        self.rebroadcasts = 0
+        self.fees = fees
+        self.sent_block = sent_block
+
+class TxScheduler:
+    def __init__(self, web3, confirmations=1, poll_interval=2, drop_timeout=180, max_rebroadcasts=3, fee_engine=None, max_in_flight=None, stuck_blocks=None):
+        self.web3 = web3
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self.drop_timeout = drop_timeout
+        self.max_rebroadcasts = max_rebroadcasts
+        self.fee_engine = fee_engine
+        self.max_in_flight = max_in_flight
+        self.stuck_blocks = stuck_blocks if stuck_blocks is not None else (fee_engine.target_blocks if fee_engine else None)
+        self.steps = {}
+
+    def add(self, step):
+        if step.name in self.steps:
+            raise ValueError(f'duplicate step name: {step.name}')
+        self.steps[step.name] = step
+        return step
+
+    def waves(self):
+        '''group steps by dependency depth - every step in a wave can be in flight at the same time'''
+        return dependency_waves(self.steps.values())
+
+    def run(self):
+        '''send & confirm every step, returns {step name: resolved value}'''
+        self.waves() # fail early on cycles / unknown deps
+        results = {}
+        pending = list(self.steps.values())
+        in_flight = []
+
+        while pending or in_flight:
+            ready = [step for step in pending if all(dep in results for dep in step.deps)]
+            if self.max_in_flight is not None:
+                ready = ready[:max(self.max_in_flight - len(in_flight), 0)]
+            if ready:
+                head = self.web3.eth.block_number
+                try:
+                    fees = self.fee_engine.estimate() if self.fee_engine else {}
+                except Exception as e:
+                    raise StepFailed(ready[0].name, f'fee estimate failed - {e}')
+            for step in ready:
+                pending.remove(step)
+                in_flight.append(InFlight(step, self._submit(step, results, fees), fees, head))
+                print(f'[sent] {step.name} - {in_flight[-1].hashes[-1]}')
+
+            if not in_flight:
+                raise StepFailed(pending[0].name, 'dependencies can never be met')
+
+            time.sleep(self.poll_interval)
+            head = self.web3.eth.block_number
+            for tx in list(in_flight):
+                receipt = self._find_receipt(tx)
+                if receipt is None:
+                    if not self._check_dropped(tx, results): # one send per nonce per poll
+                        self._check_stuck(tx, results, head)
+                    continue
+                if receipt['status'] != 1:
+                    raise StepFailed(tx.step.name, f'transaction {receipt["transactionHash"].hex()} reverted')
+                if head - receipt['blockNumber'] + 1 >= self.confirmations:
+                    in_flight.remove(tx)
+                    resolve = tx.step.resolve or (lambda results, receipt: tx.receipt)
+                    try:
+                        results[tx.step.name] = resolve(results, receipt)
+                    except Exception as e:
+                        raise StepFailed(tx.step.name, f'confirmed in block {receipt["blockNumber"]} but could not be resolved - {e}')
+                    print(f'[confirmed] {tx.step.name} in block {receipt["blockNumber"]}')
+        return results
+
+    def _submit(self, step, results, overrides):
+        tx_params = {'required_confs': 0}
+        tx_params.update(overrides)
+        try:
+            return step.submit(results, tx_params)
+        except Exception as e:
+            raise StepFailed(step.name, e)
+
+    def _resubmit(self, tx, results, fees):
+        '''
+            send <tx> again on its own nonce, None if the node refuses it - e.g. "nonce too low" when the
+            original was mined in the meantime, or "replacement underpriced". The step stays in flight and is
+            checked again later, only _check_dropped() fails it, once the nonce is used by a tx we didn't send.
+        '''
+        tx_params = {'required_confs': 0}
+        tx_params.update(fees, nonce=tx.nonce)
+        try:
+            receipt = tx.step.submit(results, tx_params)
+        except Exception as e:
+            print(f'[retry] {tx.step.name} - node refused the re-send on nonce {tx.nonce}, checking again later: {e}')
+            return None
+        self.replace(tx, receipt)
+        return receipt
+
+    def _find_receipt(self, tx):
+        '''receipt for whichever of the step's hashes got mined, None while none has'''
+        for txid in tx.hashes:
+            try:
+                receipt = self.web3.eth.get_transaction_receipt(txid)
+            except Exception: # TransactionNotFound
+                receipt = None
+            if receipt is not None and receipt['blockNumber'] is not None:
+                tx.receipt = tx.receipts[txid]
+                return receipt
+        return None
+
+    def replace(self, tx, receipt):
+        '''record a replacement (e.g. a fee bump) we sent ourselves for the same nonce'''
+        tx.hashes.append(receipt.txid)
+        tx.receipts[receipt.txid] = receipt
+        tx.last_seen = time.time()
+
+    def _check_stuck(self, tx, results, head):
+        '''still pending past its target - replace it on the same nonce with bumped fees'''
+        if self.fee_engine is None or self.stuck_blocks is None or head - tx.sent_block < self.stuck_blocks:
+            return
+        tx.sent_block = head # bumped or not, check again after another <stuck_blocks>
+        try:
+            fees = self.fee_engine.bump(tx.fees)
+        except Exception as e:
+            print(f'[stuck] {tx.step.name} - not bumping fees: {e}')
+            return
+        receipt = self._resubmit(tx, results, fees)
+        if receipt is None:
+            return
+        tx.fees = fees
+        print(f'[bumped] {tx.step.name} - max fee {fees["max_fee"] / 10**9:.2f} gwei, priority {fees["priority_fee"] / 10**9:.2f} gwei - {receipt.txid}')
+
+    def _check_dropped(self, tx, results):
+        '''re-broadcast a tx the node no longer knows, returns True if it tried to this poll'''
+        mined_nonce = self.web3.eth.get_transaction_count(tx.sender)
+        if mined_nonce > tx.nonce:
+            # nonce is used - re-check once in case one of our receipts landed between the two calls
+            if self._find_receipt(tx) is None:
+                raise StepFailed(tx.step.name, f'nonce {tx.nonce} of {tx.sender} was used by another transaction (replaced)')
+            return False
+
+        for txid in tx.hashes:
+            try:
+                self.web3.eth.get_transaction(txid)
+                tx.last_seen = time.time()
+                return False
+            except Exception: # TransactionNotFound
+                pass
+
+        if time.time() - tx.last_seen < self.drop_timeout:
+            return False
+        if tx.rebroadcasts >= self.max_rebroadcasts:
+            raise StepFailed(tx.step.name, f'dropped {tx.rebroadcasts + 1} times, giving up')
+        tx.rebroadcasts += 1
+        receipt = self._resubmit(tx, results, tx.fees)
+        if receipt is not None:
+            print(f'[rebroadcast] {tx.step.name} dropped, re-sent with nonce {tx.nonce} - {receipt.txid}')
+        return True
@@ -0,0 +1,32 @@
+import random
+import pytest
+from brownie import GTC, accounts
+from scripts import claim_simulator
+from scripts.claim_simulator import LocalSigner, domain_separator, build_tree, deploy
+
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+def test_local_signer_claim_accepted(tmp_path):
+    '''
+        claim_simulator's LocalSigner must produce claims TokenDistributor accepts,
+        otherwise every simulated claim reverts and the report only counts failures
+    '''
+    claim_simulator.load_brownie()
+    tree, amounts = build_tree({'TREE_LEAVES': 5}, random.Random(1))
+    signer = LocalSigner()
+    td = deploy(tree.root(), signer.account.address, sum(amounts))
+    signer.domain = domain_separator(td.address)
+    token = GTC.at(td.token())
+
+    user_id, claimant, delegate = 3, accounts[1], accounts[2]
+    leaf, proof = tree.leaf(user_id), tree.proof(user_id)
+    digest, signature = signer.sign(user_id, claimant.address, amounts[user_id], delegate.address, leaf)
+    balance_before = token.balanceOf(claimant)
+
+    td.claimTokens(user_id, claimant.address, amounts[user_id], delegate.address, digest, signature, proof, leaf, {'from': claimant})
+    tree.close()
+
+    assert token.balanceOf(claimant) - balance_before == amounts[user_id], "claim not paid out"
+    assert token.getCurrentVotes(delegate) == amounts[user_id], "claim not delegated on dist"
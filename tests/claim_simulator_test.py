@@ -0,0 +1,49 @@
+import random
+import pytest
+from eth_utils import keccak
+from scripts.claim_simulator import DEFAULTS, CLAIM_TYPEHASH, claim_digest, domain_separator, arrival_times, signer_queue, percentile, load_settings
+
+eth_abi = pytest.importorskip('eth_abi')
+abi_encode = getattr(eth_abi, 'encode', None) or eth_abi.encode_abi # encode_abi before eth-abi 4
+
+def test_signer_queue():
+    '''claims queue first come first served once every worker is busy'''
+    signed = signer_queue([0.0, 0.0, 0.0, 0.5, 5.0], workers=2, sign_seconds=1.0)
+    assert signed == [(1.0, 0.0), (1.0, 0.0), (2.0, 1.0), (2.0, 0.5), (6.0, 0.0)], "wrong signing times / waits"
+
+@pytest.mark.parametrize('curve', ['uniform', 'decay', 'burst'])
+def test_arrival_times(curve):
+    settings = {**DEFAULTS, 'CLAIMANTS': 2000, 'ARRIVAL_CURVE': curve}
+    times = arrival_times(settings, random.Random(1))
+    assert len(times) == 2000, "one arrival per claimant"
+    assert times == sorted(times), "arrivals not sorted"
+    assert 0 <= times[0] and times[-1] <= settings['ARRIVAL_WINDOW'], "arrival outside the window"
+    if curve == 'burst':
+        assert sum(1 for t in times if t <= 60) >= 2000 * settings['BURST_SHARE'], "burst share not in the first minute"
+    if curve == 'decay':
+        assert 0.4 < sum(1 for t in times if t <= settings['DECAY_HALF_LIFE']) / 2000 < 0.6, "half the arrivals should land within one half life"
+
+def test_percentile():
+    assert percentile([], 50) == 0
+    assert percentile(list(range(1, 101)), 50) == 51
+    assert percentile([3, 1, 2], 100) == 3, "max should be the largest value"
+
+def test_load_settings(tmp_path):
+    path = tmp_path / 'claim-sim-env'
+    path.write_text('CLAIMANTS=100\nTREE_LEAVES=10\nSIGN_SECONDS=0.2\n')
+    settings = load_settings(str(path))
+    assert (settings['CLAIMANTS'], settings['TREE_LEAVES'], settings['SIGN_SECONDS']) == (100, 100, 0.2), "settings not parsed"
+    path.write_text('ARRIVAL_CURVE=sawtooth\n')
+    with pytest.raises(ValueError):
+        load_settings(str(path))
+
+def test_claim_digest_matches_abi_encode():
+    '''same layout TokenDistributor.claimTokens() hashes - any drift and every simulated claim reverts'''
+    verifying_contract = '0x' + '42' * 20
+    user, delegate, leaf = '0x' + '01' * 20, '0x' + '02' * 20, keccak(b'leaf')
+    domain = keccak(abi_encode(['bytes32', 'bytes32', 'bytes32', 'uint256', 'address'],
+        [keccak(text='EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)'), keccak(text='GTC'), keccak(text='1.0.0'), 1, verifying_contract]))
+    hashed_claim = keccak(abi_encode(['bytes32', 'uint32', 'address', 'uint256', 'address', 'bytes32'], [CLAIM_TYPEHASH, 7, user, 10**18, delegate, leaf]))
+
+    assert domain_separator(verifying_contract) == domain, "DOMAIN_SEPARATOR differs"
+    assert claim_digest(domain, 7, user, 10**18, delegate, leaf) == keccak(b'\x19\x01' + domain + hashed_claim), "claim digest differs"
@@ -0,0 +1,18 @@
+def pytest_addoption(parser):
+    group = parser.getgroup('rpc profile')
+    group.addoption('--rpc-profile', action='store_true', default=False, help='profile RPC/HTTP calls, sleeps and gas per test')
+    group.addoption('--rpc-profile-report', default='rpc_profile.txt', help='where to write the sorted per-test report')
+    group.addoption('--rpc-budget-calls', type=int, default=None, help='fail a test that makes more RPC calls than this')
+    group.addoption('--rpc-budget-seconds', type=float, default=None, help='fail a test that spends longer than this in RPC/HTTP/sleep')
+
+def pytest_configure(config):
+    if config.getoption('rpc_profile'):
+        from rpc_profiler import RpcProfiler
+        profiler = RpcProfiler(config)
+        profiler.install()
+        config.pluginmanager.register(profiler, 'rpc_profiler')
+
+def pytest_unconfigure(config):
+    profiler = config.pluginmanager.get_plugin('rpc_profiler')
+    if profiler is not None:
+        profiler.uninstall()
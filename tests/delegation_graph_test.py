@@ -0,0 +1,48 @@
+from scripts.delegation_graph import DelegationGraph, churn, nakamoto, gini, TRANSFER, DELEGATE
+from scripts.event_stream import ZERO_ADDRESS
+
+ALICE, BOB, CAROL, DAVE = (f'0x{n:040x}' for n in range(1, 5))
+
+def graph_at(events, block):
+    graph = DelegationGraph()
+    graph.apply(events, block)
+    graph.block = block
+    return graph.snapshot()
+
+EVENTS = [
+    (1, 0, TRANSFER, ZERO_ADDRESS, ALICE, 100),
+    (1, 1, TRANSFER, ZERO_ADDRESS, BOB, 50),
+    (2, 0, DELEGATE, ALICE, CAROL, 0),
+]
+
+def test_new_delegation_is_not_moved_votes():
+    '''a holder delegating for the first time adds votes, nothing left another steward'''
+    events = EVENTS + [(3, 0, DELEGATE, BOB, DAVE, 0)]
+    report = churn(graph_at(events, 2), graph_at(events, 3))
+    assert report['votes_moved'] == 0, "new delegation counted as moved votes"
+    assert report['votes_newly_delegated'] == 50, "new delegation not reported"
+    assert report['delegations_changed'] == 1, "delegation change not counted"
+
+def test_redelegation_moves_balance():
+    events = EVENTS + [(3, 0, DELEGATE, ALICE, DAVE, 0)]
+    report = churn(graph_at(events, 2), graph_at(events, 3))
+    assert report['votes_moved'] == 100, "re-pointed balance not counted as moved"
+    assert report['stewards_joined'] == 1 and report['stewards_left'] == 1, "steward set change not reported"
+
+def test_transfers_are_reported_apart_from_moves():
+    '''bob gives alice 30 GTC: carol gains votes without anyone re-delegating'''
+    events = EVENTS + [(3, 0, TRANSFER, BOB, ALICE, 30)]
+    report = churn(graph_at(events, 2), graph_at(events, 3))
+    assert report['votes_moved'] == 0, "transfer counted as moved votes"
+    assert report['votes_from_transfers'] == 30, "transfer into a delegated balance not reported"
+
+def test_undelegation():
+    events = EVENTS + [(3, 0, DELEGATE, ALICE, ZERO_ADDRESS, 0)]
+    report = churn(graph_at(events, 2), graph_at(events, 3))
+    assert report['votes_undelegated'] == 100 and report['votes_moved'] == 0, "dropped delegation misreported"
+
+def test_concentration_helpers():
+    assert nakamoto([5, 3, 2], 5) == 1, "quorum reached by one steward"
+    assert nakamoto([5, 3, 2], 5, strict=True) == 2, "strict threshold needs more than 5"
+    assert nakamoto([1], 5) is None, "unreachable threshold"
+    assert gini([1, 1, 1, 1]) == 0.0, "even split should have gini 0"
@@ -0,0 +1,72 @@
+import importlib.util
+import os
+import time
+import pytest
+
+def load_deploy_all():
+    '''deploy-all.py is not an importable name, load it from its path - plan mode never imports brownie'''
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'deploy-all.py')
+    spec = importlib.util.spec_from_file_location('deploy_all', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+ADDRESS = '0xA1df472Fc3d9f9E5F54137D2878A3fA8adB63351'
+FUTURE = int(time.time()) + 10**7
+
+def write_env(tmp_path, **overrides):
+    team = tmp_path / 'team.csv'
+    team.write_text(f'{ADDRESS},1000000000000000000000\n')
+    funders = tmp_path / 'funders.csv'
+    funders.write_text(f'{ADDRESS},500 ether\n{ADDRESS},2 ether\n')
+    values = {
+        'PUBLISH_SOURCE_TO_ETHERSCAN': 'False', 'DEPLOY_FROM': ADDRESS, 'HOPPER_ADDRESS': ADDRESS,
+        'TEAM_DIST': str(team), 'FUNDERS_DIST': str(funders), 'INITIAL_MINT': '100000000',
+        'TIMELOCK_ADMIN': ADDRESS, 'TIMELOCK_DELAY': '172800', 'GTC_MINT_AFTER': str(FUTURE),
+        'TOKEN_CLAIM_SIGNER': ADDRESS, 'MERKLE_ROOT': '0x' + '11' * 32,
+        'TREASURY_VESTING_AMOUNT': '50000000', 'TREASURY_VESTING_BEGIN': str(FUTURE),
+        'TREASURY_VESTING_CLIFF': str(FUTURE), 'TREASURY_VESTING_END': str(FUTURE + 1),
+        'VALIDATE_PARAMS': 'True', 'MINIMUM_DELAY': '172800', 'MAXIMUM_DELAY': '2592000',
+    }
+    values.update(overrides)
+    env = tmp_path / 'env'
+    env.write_text(''.join(f"{name}='{value}'\n" for name, value in values.items() if value is not None))
+    return str(env)
+
+def test_every_error_in_one_pass(tmp_path, capsys):
+    '''parse errors and cross-field checks are all listed by the same run'''
+    deploy_all = load_deploy_all()
+    (tmp_path / 'bad_team.csv').write_text(f'{ADDRESS},1000\nnot-an-address,5\n{ADDRESS},lots\n')
+    env = write_env(tmp_path,
+        TIMELOCK_ADMIN='0x1234', # parse error
+        MERKLE_ROOT='0xabcd', # parse error
+        TIMELOCK_DELAY='60', # parses, below MINIMUM_DELAY
+        MAXIMUM_DELAY=None, # missing
+        TREASURY_VESTING_END=str(FUTURE - 1), # parses, before the cliff
+        TEAM_DIST=str(tmp_path / 'bad_team.csv'))
+
+    with pytest.raises(SystemExit):
+        deploy_all.configure(env)
+    output = capsys.readouterr().out
+
+    for expected in ('TIMELOCK_ADMIN', 'MERKLE_ROOT', 'TIMELOCK_DELAY must be >= MINIMUM_DELAY', 'MAXIMUM_DELAY is required',
+            'TREASURY_VESTING_END must be > TREASURY_VESTING_CLIFF', 'TEAM_DIST row 1 address', 'TEAM_DIST row 2 amount'):
+        assert expected in output, f"{expected} not reported"
+    assert 'must be <= MAXIMUM_DELAY' not in output, "compared against a missing MAXIMUM_DELAY"
+    assert 'Found 7 problem(s)' in output, "unexpected number of problems"
+
+def test_plan_waves(tmp_path, capsys):
+    '''independent deploys go out together, every hopper transfer lands before the TreasuryVester sweep'''
+    deploy_all = load_deploy_all()
+    deploy_all.plan(write_env(tmp_path))
+    output = capsys.readouterr().out
+    waves = [[step.name for step in wave] for wave in deploy_all.dependency_waves(deploy_all.deploy_steps())]
+
+    assert waves == [
+        ['Timelock', 'GTC'],
+        ['TokenDistributor', 'GovernorAlpha', 'TreasuryVester', 'transfer to team #0', 'transfer to funders #0', 'transfer to funders #1'],
+        ['setGTCDist', 'transfer to TokenDistributor'],
+        ['setMinter', 'transfer to TreasuryVester'],
+    ], "unexpected deploy waves"
+    assert '12 transactions in 4 rounds' in output, "plan header doesn't match the waves"
+    assert 'expected 49,998,498 GTC' in output, "TreasuryVester sweep doesn't account for the payouts"
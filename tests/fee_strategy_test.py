@@ -0,0 +1,111 @@
+import pytest
+from scripts.fee_strategy import FeeEngine, ScriptedFeeHistory, FeeCapExceeded, GWEI
+from scripts.tx_scheduler import TxScheduler, Step
+
+# base fee climbing the max 12.5% per block (full blocks) from 50 gwei, then flat
+RISING = [int(50 * GWEI * 1.125 ** n) for n in range(12)] + [int(50 * GWEI * 1.125 ** 11)] * 20
+
+def test_estimate_covers_target_blocks():
+    '''max fee should still cover the base fee <target_blocks> from now, even if every block is full'''
+    history = ScriptedFeeHistory(RISING)
+    engine = FeeEngine(history, target_blocks=3)
+    for _ in range(8):
+        fees = engine.estimate()
+        assert fees['max_fee'] >= RISING[history.block + 3] + fees['priority_fee'] - 1, "max fee falls behind a rising base fee"
+        history.advance()
+
+def test_priority_fee_floor():
+    '''tips from recent blocks are used, but never below min_priority_fee'''
+    engine = FeeEngine(ScriptedFeeHistory(RISING, tip=0), min_priority_fee=GWEI)
+    assert engine.estimate()['priority_fee'] == GWEI, "priority fee below floor"
+
+    engine = FeeEngine(ScriptedFeeHistory(RISING, tip=3 * GWEI), min_priority_fee=GWEI)
+    assert engine.estimate()['priority_fee'] == 3 * GWEI, "priority fee ignores recent tips"
+
+def test_bump_meets_replacement_rule():
+    '''nodes only accept a replacement with >= 10% more on both fees'''
+    engine = FeeEngine(ScriptedFeeHistory([10 * GWEI] * 5))
+    old = {'max_fee': 100 * GWEI, 'priority_fee': 2 * GWEI}
+    new = engine.bump(old)
+    assert new['max_fee'] >= old['max_fee'] * 1.1, "max fee not bumped enough"
+    assert new['priority_fee'] >= old['priority_fee'] * 1.1, "priority fee not bumped enough"
+
+def test_bump_respects_cap():
+    engine = FeeEngine(ScriptedFeeHistory([10 * GWEI] * 5), max_fee=100 * GWEI)
+    with pytest.raises(FeeCapExceeded):
+        engine.bump({'max_fee': 95 * GWEI, 'priority_fee': 2 * GWEI})
+
+def test_batch_size():
+    '''a quarter of a 15m gas target over 3 blocks fits 112 transfers of 100k gas'''
+    engine = FeeEngine(ScriptedFeeHistory([10 * GWEI] * 5, gas_limit=30_000_000), target_blocks=3, block_share=0.25)
+    assert engine.batch_size(100_000) == 112, "unexpected batch size"
+
+def test_stuck_payout_is_bumped():
+    '''
+        Scripted chain: the base fee jumps past what the first estimate covered, so the payouts
+        get stuck until the scheduler replaces them with bumped fees on the same nonce.
+    '''
+    base_fees = [10 * GWEI] * 3 + [40 * GWEI] * 30
+    chain = ScriptedChain(base_fees)
+    engine = FeeEngine(chain.history, target_blocks=2)
+    scheduler = TxScheduler(chain, poll_interval=0, fee_engine=engine, max_in_flight=2)
+    for number in range(5):
+        scheduler.add(Step(f'transfer #{number}', chain.send))
+
+    results = scheduler.run()
+
+    assert len(results) == 5, "not every payout confirmed"
+    assert chain.replaced > 0, "stuck payouts were never bumped"
+    assert all(receipt.max_fee >= 40 * GWEI for receipt in results.values()), "payout mined below the base fee"
+
+class ScriptedReceipt:
+    def __init__(self, txid, nonce, max_fee, sent_block):
+        self.txid = txid
+        self.sender = '0x0000000000000000000000000000000000000001'
+        self.nonce = nonce
+        self.max_fee = max_fee
+        self.sent_block = sent_block
+
+class ScriptedChain:
+    '''
+        minimal stand-in for web3: one block per poll, a tx is mined once it has waited
+        a block in the mempool and its max fee covers the base fee
+    '''
+    def __init__(self, base_fees):
+        self.history = ScriptedFeeHistory(base_fees)
+        self.eth = self
+        self.mempool = {} # nonce -> receipt
+        self.mined = {} # txid -> receipt dict
+        self.next_nonce = 0
+        self.sent = 0
+        self.replaced = 0
+
+    def send(self, results, tx):
+        nonce = tx.get('nonce', self.next_nonce)
+        if nonce == self.next_nonce:
+            self.next_nonce += 1
+        else:
+            self.replaced += 1
+        self.sent += 1
+        receipt = ScriptedReceipt(f'0x{self.sent:064x}', nonce, tx['max_fee'], self.history.block)
+        self.mempool[nonce] = receipt
+        return receipt
+
+    @property
+    def block_number(self):
+        self.history.advance()
+        base_fee = self.history.base_fees[self.history.block]
+        for nonce, receipt in list(self.mempool.items()):
+            if self.history.block >= receipt.sent_block + 2 and receipt.max_fee >= base_fee:
+                self.mined[receipt.txid] = {'status': 1, 'blockNumber': self.history.block, 'transactionHash': bytes.fromhex(receipt.txid[2:])}
+                del self.mempool[nonce]
+        return self.history.block
+
+    def get_transaction_receipt(self, txid):
+        return self.mined.get(txid)
+
+    def get_transaction_count(self, sender):
+        return len(self.mined)
+
+    def get_transaction(self, txid):
+        return {}
@@ -0,0 +1,113 @@
+import json
+import math
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from scripts.event_stream import ZERO_ADDRESS
+from scripts.holder_snapshot import balances_at, eligible, contract_addresses, allocate, write_distribution, load_rules, DEFAULT_RULES
+from scripts.merkle_tree import MerkleTree, leaf_hash, read_dist
+
+def address(n):
+    return '0x' + f'{n:040x}'
+
+def rules(**overrides):
+    return {**DEFAULT_RULES, **overrides}
+
+def test_balances_at():
+    '''mints come from the zero address, burns go to it - neither gets a balance'''
+    transfers = [
+        (1, 0, 'T', ZERO_ADDRESS, address(1), 100),
+        (1, 1, 'T', address(1), address(2), 30),
+        (2, 0, 'T', address(2), address(3), 30),
+        (2, 1, 'T', address(1), ZERO_ADDRESS, 10),
+    ]
+    assert balances_at(transfers) == {address(1): 60, address(2): 0, address(3): 30}, "wrong balances"
+
+def test_eligible():
+    excluded = '0xDE30da39c46104798bB5aA3fe8B9e0e1F348163F' # checksummed in the rules file, lower case in balances
+    balances = {address(1): 5 * 10**18, address(2): 10**18 - 1, address(3): 0, excluded.lower(): 10**24, address(4): -1}
+    holders = eligible(balances, rules(min_balance=1, exclude=[excluded]))
+    assert holders == [(address(1), 5 * 10**18)], "min balance / exclusion not applied"
+
+    asked = []
+    def find_contracts(addresses):
+        asked.extend(addresses)
+        return {address(1)}
+    holders = eligible(balances, rules(exclude_contracts=True, exclude=[excluded]), find_contracts)
+    assert holders == [(address(2), 10**18 - 1)], "contracts not excluded"
+    assert sorted(asked) == [address(1), address(2)], "code checked for holders the other rules already dropped"
+
+def test_contract_addresses():
+    '''eth_getCode goes out in JSON-RPC batches of <batch_size>, one HTTP request each'''
+    requests_seen = []
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            batch = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            requests_seen.append(len(batch))
+            results = [{'jsonrpc': '2.0', 'id': call['id'], 'result': '0x6080' if int(call['params'][0], 16) % 3 == 0 else '0x'}
+                for call in reversed(batch)] # batch replies may come back in any order
+            body = json.dumps(results).encode()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        contracts = contract_addresses(f'http://127.0.0.1:{server.server_port}', [address(n) for n in range(25)], batch_size=10)
+    finally:
+        server.shutdown()
+    assert contracts == {address(n) for n in range(0, 25, 3)}, "wrong contracts"
+    assert requests_seen == [10, 10, 5], "calls not batched"
+
+@pytest.mark.parametrize('weighting, expected_weight', [
+    ('linear', lambda balance: balance),
+    ('sqrt', math.isqrt),
+    ('capped', lambda balance: min(balance, 1000 * 10**18)),
+])
+def test_allocate(weighting, expected_weight):
+    '''amounts follow the weights to within 1 wei and always add up to exactly the total'''
+    rng = random.Random(weighting)
+    holders = [(address(n), rng.randrange(1, 5000 * 10**18)) for n in range(200)]
+    total = 1_000_000 * 10**18 + 7
+    amounts = dict(allocate(holders, total, rules(weighting=weighting, cap=1000)))
+
+    assert sum(amounts.values()) == total, "allocation doesn't add up to the total"
+    weights = [expected_weight(balance) for _, balance in holders]
+    for (holder, _), w in zip(holders, weights):
+        share = total * w // sum(weights)
+        assert amounts.get(holder, 0) in (share, share + 1), f"{holder} off its {weighting} share"
+
+def test_allocate_needs_holders():
+    with pytest.raises(ValueError):
+        list(allocate([], 10**18, rules()))
+
+def test_load_rules(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text('{"weighting": "capped"}')
+    with pytest.raises(ValueError):
+        load_rules(str(path))
+    assert load_rules(None) == DEFAULT_RULES, "defaults changed"
+
+def test_csv_round_trip(tmp_path):
+    '''the csv written reads back through merkle_tree.read_dist to the same leaves and root'''
+    holders = [(address(n), (n + 1) * 10**18) for n in range(37)]
+    allocations = list(allocate(holders, 10_000 * 10**18, rules(weighting='sqrt')))
+    out = str(tmp_path / 'round2')
+    root = write_distribution(out, iter(allocations), len(allocations), first_user_id=5)
+
+    rows = list(read_dist(f'{out}.csv'))
+    assert rows == [(user_id, amount) for user_id, (_, amount) in enumerate(allocations, start=5)], "csv doesn't read back"
+    with open(f'{out}.leaves') as f:
+        assert [line.strip() for line in f] == ['0x' + leaf_hash(*row).hex() for row in rows], "leaves file out of step with the csv"
+    rebuilt = MerkleTree.create(str(tmp_path / 'rebuilt.nodes'), (leaf_hash(*row) for row in rows), count=len(rows))
+    assert rebuilt.root() == root, "root differs from a rebuild from the csv"
+    rebuilt.close()
+
+def test_user_id_overflow(tmp_path):
+    with pytest.raises(ValueError):
+        write_distribution(str(tmp_path / 'out'), iter([(address(1), 1), (address(2), 1)]), 2, first_user_id=2**32 - 1)
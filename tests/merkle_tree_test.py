@@ -0,0 +1,111 @@
+import random
+import pytest
+from scripts.merkle_tree import MerkleTree, leaf_hash, hash_pair, verify_proof, level_sizes, read_rows, parse_rows
+
+def naive_levels(leaves):
+    '''every level rebuilt from scratch, odd node out promoted as-is'''
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        levels.append([hash_pair(level[i], level[i + 1]) if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)])
+    return levels
+
+def naive_proof(levels, index):
+    proof = []
+    for level in levels[:-1]:
+        if index ^ 1 < len(level):
+            proof.append(level[index ^ 1])
+        index //= 2
+    return proof
+
+def assert_matches_rebuild(tree, leaves):
+    levels = naive_levels(leaves)
+    assert tree.count == len(leaves), "leaf count out of sync"
+    assert tree.root() == levels[-1][0], "root differs from a full rebuild"
+    for index in range(len(leaves)):
+        proof = tree.proof(index)
+        assert proof == naive_proof(levels, index), f"proof {index} differs from a full rebuild"
+        assert verify_proof(proof, tree.root(), leaves[index]), f"proof {index} does not verify"
+
+def random_leaf(rng):
+    return leaf_hash(rng.randrange(2**32), rng.randrange(10**24))
+
+def test_level_sizes_promote_odd_nodes():
+    assert level_sizes(5) == [5, 3, 2, 1], "odd node not promoted"
+    assert level_sizes(1) == [1], "single leaf is its own root"
+
+def test_create_matches_rebuild(tmp_path):
+    '''odd counts at several levels, so promoted nodes show up all the way up the tree'''
+    rng = random.Random(1)
+    for count in (1, 2, 3, 5, 7, 13, 33):
+        leaves = [random_leaf(rng) for _ in range(count)]
+        tree = MerkleTree.create(str(tmp_path / f'{count}.nodes'), leaves)
+        assert_matches_rebuild(tree, leaves)
+        tree.close()
+
+def test_streamed_create_checks_count(tmp_path):
+    rng = random.Random(2)
+    leaves = [random_leaf(rng) for _ in range(9)]
+    tree = MerkleTree.create(str(tmp_path / 'nodes'), iter(leaves), count=9)
+    assert_matches_rebuild(tree, leaves)
+    tree.close()
+    for count in (8, 10):
+        with pytest.raises(ValueError):
+            MerkleTree.create(str(tmp_path / 'bad'), iter(leaves), count=count)
+
+def test_random_updates_match_rebuild(tmp_path):
+    '''
+        random edits & appends, each checked against a naive rebuild: root, every proof, and
+        stale_ranges covering exactly the leaves that were set plus those whose proof changed
+    '''
+    rng = random.Random(3)
+    leaves = [random_leaf(rng) for _ in range(11)]
+    tree = MerkleTree.create(str(tmp_path / 'nodes'), leaves, capacity=16)
+    grew = False
+    for _ in range(40):
+        before = [tree.proof(i) for i in range(tree.count)]
+        capacity = tree.capacity
+        changes = {rng.randrange(len(leaves)): random_leaf(rng) for _ in range(rng.randint(0, 3))}
+        for index in range(len(leaves), len(leaves) + rng.randint(0, 3)):
+            changes[index] = random_leaf(rng)
+        for index, leaf in changes.items():
+            if index < len(leaves):
+                leaves[index] = leaf
+            else:
+                leaves.append(leaf)
+
+        result = tree.update(changes)
+
+        grew = grew or tree.capacity > capacity
+        assert result.root == tree.root(), "result root is not the tree root"
+        assert_matches_rebuild(tree, leaves)
+        if tree.capacity == capacity: # a grow reports everything as stale
+            changed = set(changes) | {i for i, proof in enumerate(before) if tree.proof(i) != proof}
+            assert set(result.stale_indices()) == changed, "stale ranges don't match the proofs that changed"
+    assert grew, "tree never grew past its capacity"
+    tree.close()
+
+def test_appends_must_be_contiguous(tmp_path):
+    rng = random.Random(4)
+    tree = MerkleTree.create(str(tmp_path / 'nodes'), [random_leaf(rng) for _ in range(4)])
+    with pytest.raises(ValueError):
+        tree.update({5: random_leaf(rng)})
+    tree.close()
+
+def test_reopen_node_file(tmp_path):
+    rng = random.Random(5)
+    leaves = [random_leaf(rng) for _ in range(6)]
+    path = str(tmp_path / 'nodes')
+    MerkleTree.create(path, leaves).close()
+    tree = MerkleTree(path)
+    assert_matches_rebuild(tree, leaves)
+    tree.close()
+
+def test_read_only_amended_rows(tmp_path):
+    '''--rows path: only the listed rows are read, anything past the end is an error'''
+    dist = tmp_path / 'dist.csv'
+    dist.write_text('address,user_id,total_claim\n' + ''.join(f'0x{i:040x},{i + 1},{i * 10}\n' for i in range(10)))
+    assert parse_rows('1,3-5') == [1, 3, 4, 5], "row ranges not expanded"
+    assert read_rows(str(dist), [1, 4]) == {1: (2, 10), 4: (5, 40)}, "wrong rows read"
+    with pytest.raises(ValueError):
+        read_rows(str(dist), [10])
@@ -0,0 +1,56 @@
+import csv
+import json
+import os
+import pytest
+from scripts.merkle_tree import MerkleTree, leaf_hash
+from scripts.proof_bundles import build, verify, shard_name, MANIFEST
+
+def write_dist(tmp_path, rows):
+    '''dist csv + node file for [(user_id, amount)], same columns as tests/initial_dist.csv'''
+    dist_file = str(tmp_path / 'dist.csv')
+    with open(dist_file, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['address', 'user_id', 'total_claim'])
+        for user_id, amount in rows:
+            writer.writerow(['0x' + f'{user_id:040x}', user_id, amount])
+    node_file = str(tmp_path / 'dist.nodes')
+    tree = MerkleTree.create(node_file, (leaf_hash(user_id, amount) for user_id, amount in rows), count=len(rows))
+    root = tree.root()
+    tree.close()
+    return dist_file, node_file, root
+
+def test_build_then_verify(tmp_path):
+    rows = [(user_id, user_id * 10**18 + 1) for user_id in range(1, 301)]
+    dist_file, node_file, root = write_dist(tmp_path, rows)
+    out_dir = str(tmp_path / 'bundles')
+
+    manifest = build(dist_file, node_file, out_dir, digits=1, merkle_root=root, processes=2)
+    assert manifest['merkle_root'] == '0x' + root.hex(), "manifest root differs from the node file"
+    assert len(manifest['shards']) == 16, "user ids not spread over every shard"
+    assert verify(out_dir, root, processes=2) == (len(rows), []), "fresh bundle does not verify"
+
+    with open(os.path.join(out_dir, f'{shard_name(7, 1)}.json')) as f:
+        assert json.load(f)['7'][:2] == [str(7 * 10**18 + 1), '0x' + leaf_hash(7, 7 * 10**18 + 1).hex()], "claim written wrong"
+
+def test_verify_catches_tampering(tmp_path):
+    rows = [(user_id, 10**18) for user_id in range(1, 41)]
+    dist_file, node_file, root = write_dist(tmp_path, rows)
+    out_dir = str(tmp_path / 'bundles')
+    build(dist_file, node_file, out_dir, digits=1, processes=1)
+
+    path = os.path.join(out_dir, f'{shard_name(3, 1)}.json')
+    with open(path) as f:
+        claims = json.load(f)
+    claims['3'][0] = str(2 * 10**18)
+    with open(path, 'w') as f:
+        json.dump(claims, f)
+    _, problems = verify(out_dir, processes=1)
+    assert problems, "edited shard passed verification"
+
+def test_duplicate_user_id_rejected(tmp_path):
+    '''a repeated user_id would overwrite the first claim in its shard, leaving a leaf without a bundle entry'''
+    rows = [(1, 10**18), (2, 10**18), (1, 5 * 10**18)]
+    dist_file, node_file, _ = write_dist(tmp_path, rows)
+    with pytest.raises(ValueError, match='user_id 1'):
+        build(dist_file, node_file, str(tmp_path / 'bundles'), digits=1, processes=1)
+    assert not os.path.exists(tmp_path / 'bundles' / MANIFEST), "manifest written for a bad distribution"
@@ -0,0 +1,236 @@
+import threading
+import time
+from collections import Counter
+import pytest
+
+'''
+pytest plugin - per test RPC / HTTP / sleep / gas profile for the brownie test suites.
+
+Enabled with --rpc-profile (see conftest.py). For every test it records:
+    - JSON-RPC calls to the node by method, and time spent in them (web3 HTTPProvider)
+    - other HTTP calls (e.g. the ESMS in generate_claim()) and time spent in them (requests)
+    - time.sleep() calls and time slept
+    - transactions sent and gas used (brownie tx history)
+Setup, call & teardown are counted separately. Fixture setup (e.g. the module scoped deploys) shows up in
+the "setup s" column of the first test that needs it; every other column is the test body alone.
+
+A sorted report is written to --rpc-profile-report, and --rpc-budget-calls / --rpc-budget-seconds
+fail any test whose body (the call phase) goes over budget, so a change that adds round trips shows up
+as a failing test - without failing whichever test happens to run a module's fixtures first.
+'''
+
+PHASES = ('setup', 'call', 'teardown')
+
+class PhaseProfile:
+    '''RPC / HTTP / sleep counts for one phase of one test'''
+    def __init__(self):
+        self.rpc_calls = Counter()
+        self.rpc_time = 0.0
+        self.http_calls = 0
+        self.http_time = 0.0
+        self.sleep_calls = 0
+        self.sleep_time = 0.0
+
+    @property
+    def total_rpc_calls(self):
+        return sum(self.rpc_calls.values())
+
+    @property
+    def waiting_time(self):
+        return self.rpc_time + self.http_time + self.sleep_time
+
+class RunProfile:
+    def __init__(self, nodeid):
+        self.nodeid = nodeid
+        self.phases = {when: PhaseProfile() for when in PHASES}
+        self.transactions = 0
+        self.gas_used = 0
+        self.duration = 0.0
+
+    @property
+    def setup(self):
+        return self.phases['setup']
+
+    @property
+    def call(self):
+        return self.phases['call']
+
+    @property
+    def waiting_time(self):
+        return sum(phase.waiting_time for phase in self.phases.values())
+
+class RpcProfiler:
+    def __init__(self, config):
+        self.report_path = config.getoption('rpc_profile_report')
+        self.budget_calls = config.getoption('rpc_budget_calls')
+        self.budget_seconds = config.getoption('rpc_budget_seconds')
+        self.profiles = []
+        self.current = None
+        self.phase = None # PhaseProfile being counted, None between phases & tests
+        self._local = threading.local() # don't count the node's own HTTP traffic as HTTP calls
+        self._patched = []
+        self._history_start = None
+
+    # -- patching --
+
+    def _patch(self, owner, name, wrapper):
+        original = getattr(owner, name)
+        setattr(owner, name, wrapper(original))
+        self._patched.append((owner, name, original))
+
+    def install(self):
+        import requests
+        profiler = self
+
+        def wrap_rpc(original):
+            def make_request(provider, method, params):
+                profile = profiler.phase
+                profiler._local.in_rpc = True
+                start = time.perf_counter()
+                try:
+                    return original(provider, method, params)
+                finally:
+                    profiler._local.in_rpc = False
+                    if profile is not None:
+                        profile.rpc_calls[method] += 1
+                        profile.rpc_time += time.perf_counter() - start
+            return make_request
+
+        def wrap_http(original):
+            def request(session, *args, **kwargs):
+                profile = profiler.phase
+                if profile is None or getattr(profiler._local, 'in_rpc', False):
+                    return original(session, *args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return original(session, *args, **kwargs)
+                finally:
+                    profile.http_calls += 1
+                    profile.http_time += time.perf_counter() - start
+            return request
+
+        def wrap_sleep(original):
+            def sleep(seconds):
+                profile = profiler.phase
+                start = time.perf_counter()
+                try:
+                    return original(seconds)
+                finally:
+                    if profile is not None:
+                        profile.sleep_calls += 1
+                        profile.sleep_time += time.perf_counter() - start
+            return sleep
+
+        try:
+            from web3 import HTTPProvider
+            self._patch(HTTPProvider, 'make_request', wrap_rpc)
+        except ImportError: # no node in this run, still profile HTTP & sleeps
+            pass
+        self._patch(requests.Session, 'request', wrap_http)
+        self._patch(time, 'sleep', wrap_sleep)
+
+    def uninstall(self):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+    # -- gas, from brownie's tx history --
+
+    def _history(self):
+        try:
+            from brownie import history
+            return history
+        except ImportError:
+            return None
+
+    def _history_txids(self):
+        history = self._history()
+        return None if history is None else {tx.txid for tx in history}
+
+    def _count_gas(self, profile):
+        history = self._history()
+        if history is None or self._history_start is None:
+            return
+        for tx in history:
+            if tx.txid not in self._history_start:
+                profile.transactions += 1
+                profile.gas_used += tx.gas_used or 0
+
+    # -- hooks --
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self.current = RunProfile(item.nodeid)
+        self._history_start = self._history_txids()
+        start = time.perf_counter()
+        yield
+        self.current.duration = time.perf_counter() - start
+        self.profiles.append(self.current)
+        self.current = None
+
+    def _run_phase(self, when):
+        self.phase = self.current.phases[when] if self.current is not None else None
+        yield
+        self.phase = None
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        yield from self._run_phase('setup')
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        yield from self._run_phase('call')
+        # count before teardown - fn_isolation reverts the chain, and brownie drops the reverted txs from history
+        self._count_gas(self.current)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item, nextitem):
+        yield from self._run_phase('teardown')
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        if call.when != 'call' or not report.passed or self.current is None:
+            return
+        problems = []
+        body = self.current.call # fixture setup isn't part of the test's budget
+        if self.budget_calls is not None and body.total_rpc_calls > self.budget_calls:
+            problems.append(f'{body.total_rpc_calls} RPC calls, budget is {self.budget_calls}')
+        if self.budget_seconds is not None and body.waiting_time > self.budget_seconds:
+            problems.append(f'{body.waiting_time:.2f}s in RPC/HTTP/sleep, budget is {self.budget_seconds}s')
+        if problems:
+            report.outcome = 'failed'
+            report.longrepr = 'RPC profile budget exceeded: ' + '; '.join(problems) + '\n' + self._calls_line(body)
+
+    def pytest_sessionfinish(self, session):
+        if self.report_path:
+            with open(self.report_path, 'w') as f:
+                f.write(self.format_report())
+
+    def pytest_terminal_summary(self, terminalreporter):
+        terminalreporter.section('rpc profile')
+        for line in self.format_report(limit=10).splitlines():
+            terminalreporter.write_line(line)
+        if self.report_path:
+            terminalreporter.write_line(f'full report: {self.report_path}')
+
+    # -- report --
+
+    @staticmethod
+    def _calls_line(phase):
+        return '    ' + ', '.join(f'{method}: {count}' for method, count in phase.rpc_calls.most_common())
+
+    def format_report(self, limit=None):
+        '''tests sorted by time spent waiting on RPC/HTTP/sleep (all phases), slowest first'''
+        profiles = sorted(self.profiles, key=lambda p: p.waiting_time, reverse=True)
+        lines = [f'{"test":<70} {"total":>8} {"setup s":>8} {"rpc#":>6} {"rpc s":>8} {"http#":>6} {"http s":>8} {"sleep s":>8} {"txs":>5} {"gas":>10}']
+        for profile in profiles[:limit]:
+            body = profile.call
+            lines.append(
+                f'{profile.nodeid[-70:]:<70} {profile.duration:>8.2f} {profile.setup.waiting_time:>8.2f} {body.total_rpc_calls:>6} {body.rpc_time:>8.2f} '
+                f'{body.http_calls:>6} {body.http_time:>8.2f} {body.sleep_time:>8.2f} {profile.transactions:>5} {profile.gas_used:>10}'
+            )
+            if body.rpc_calls:
+                lines.append(self._calls_line(body))
+        return '\n'.join(lines) + '\n'
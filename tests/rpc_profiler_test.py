@@ -0,0 +1,117 @@
+import os
+import pytest
+
+pytest_plugins = ['pytester']
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+@pytest.fixture
+def profiled(pytester):
+    '''a pytester dir with this suite's conftest & plugin, run in a subprocess - the plugin patches time.sleep process wide'''
+    for name in ('conftest.py', 'rpc_profiler.py'):
+        with open(os.path.join(TESTS_DIR, name)) as f:
+            pytester.makepyfile(**{name[:-3]: f.read()})
+    def run(*args):
+        return pytester.runpytest_subprocess('--rpc-profile', '--rpc-profile-report', 'report.txt', *args)
+    return run
+
+def report_rows(pytester):
+    '''(test name, row) from the written report, in report order'''
+    with open(pytester.path / 'report.txt') as f:
+        lines = f.read().splitlines()[1:]
+    return [(line.split()[0].split('::')[-1], line.split()) for line in lines if not line.startswith('    ')]
+
+def test_report_sorted_by_waiting_time(pytester, profiled):
+    pytester.makepyfile(test_sleepy='''
+        import time
+        def test_short():
+            time.sleep(0.01)
+        def test_long():
+            time.sleep(0.2)
+        def test_middle():
+            time.sleep(0.1)
+    ''')
+    profiled().assert_outcomes(passed=3)
+    assert [name for name, _ in report_rows(pytester)] == ['test_long', 'test_middle', 'test_short'], "report not sorted slowest first"
+
+def test_budget_fails_slow_test_body(pytester, profiled):
+    pytester.makepyfile(test_budget='''
+        import time
+        def test_fast():
+            pass
+        def test_slow():
+            time.sleep(0.3)
+    ''')
+    result = profiled('--rpc-budget-seconds', '0.2')
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines(['*RPC profile budget exceeded*budget is 0.2s*'])
+    assert 'FAILED test_budget.py::test_slow' in result.stdout.str(), "wrong test failed"
+
+def test_fixture_setup_not_in_budget(pytester, profiled):
+    '''a module scoped fixture (e.g. the contract deploys) runs in the first test's setup phase - not its budget'''
+    pytester.makepyfile(test_fixture='''
+        import time
+        import pytest
+        @pytest.fixture(scope='module')
+        def deployed():
+            time.sleep(0.3)
+        def test_first(deployed):
+            pass
+        def test_second(deployed):
+            pass
+    ''')
+    profiled('--rpc-budget-seconds', '0.2').assert_outcomes(passed=2)
+    rows = dict(report_rows(pytester))
+    assert float(rows['test_first'][2]) >= 0.3, "fixture setup not reported in the setup column"
+    assert float(rows['test_first'][7]) < 0.2, "fixture setup counted as the test's own sleep"
+
+def test_node_traffic_not_counted_as_http(pytester, profiled):
+    '''JSON-RPC goes out through requests too - it counts as RPC only, other requests count as HTTP'''
+    pytester.makepyfile(web3='''
+        import requests
+        class HTTPProvider: # stand-in for web3's, which posts its JSON-RPC through a requests session the same way
+            def __init__(self, uri):
+                self.uri = uri
+                self.session = requests.Session()
+            def make_request(self, method, params):
+                return self.session.post(self.uri, json={'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}).json()
+    ''')
+    pytester.makepyfile(test_traffic='''
+        import json
+        import threading
+        import requests
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+        from web3 import HTTPProvider
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                self._reply()
+            def do_GET(self):
+                self._reply()
+            def _reply(self):
+                body = json.dumps({'jsonrpc': '2.0', 'id': 1, 'result': '0x1'}).encode()
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, *args):
+                pass
+
+        def test_traffic():
+            server = HTTPServer(('127.0.0.1', 0), Handler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            uri = f'http://127.0.0.1:{server.server_port}'
+            provider = HTTPProvider(uri)
+            provider.make_request('eth_blockNumber', [])
+            provider.make_request('eth_blockNumber', [])
+            provider.make_request('eth_chainId', [])
+            requests.get(uri)
+            server.shutdown()
+    ''')
+    profiled().assert_outcomes(passed=1)
+    rows = dict(report_rows(pytester))
+    assert rows['test_traffic'][3] == '3', "RPC calls not counted"
+    assert rows['test_traffic'][5] == '1', "node traffic counted as HTTP"
+    with open(pytester.path / 'report.txt') as f:
+        assert '    eth_blockNumber: 2, eth_chainId: 1' in f.read(), "RPC calls by method missing"
@@ -0,0 +1,58 @@
+import pytest
+from eth_utils import keccak
+from scripts.timelock_monitor import timelock_tx_hash, decode_timelock_event, QueueIndex, QUEUE_TOPIC, EXECUTE_TOPIC, CANCEL_TOPIC, GRACE_PERIOD
+
+eth_abi = pytest.importorskip('eth_abi')
+abi_encode = getattr(eth_abi, 'encode', None) or eth_abi.encode_abi # encode_abi before eth-abi 4
+
+TARGET = '0xde30da39c46104798bb5aa3fe8b9e0e1f348163f'
+ACTIONS = [ # (signature, data) - empty, word aligned and unaligned dynamic fields
+    ('', b''),
+    ('setPendingAdmin(address)', bytes(12) + bytes.fromhex(TARGET[2:])),
+    ('transfer(address,uint256)', bytes(range(68))),
+]
+
+@pytest.mark.parametrize('signature, data', ACTIONS)
+def test_tx_hash_matches_abi_encode(signature, data):
+    '''must be byte for byte what Timelock.sol hashes, or queued actions are never matched to their proposal'''
+    eta = 1_700_000_000
+    expected = keccak(abi_encode(['address', 'uint256', 'string', 'bytes', 'uint256'], [TARGET, 10**18, signature, data, eta]))
+    assert timelock_tx_hash(TARGET, 10**18, signature, data, eta) == '0x' + expected.hex(), "hash differs from abi.encode"
+
+def timelock_log(topic, signature, data, eta, value=0):
+    '''log as the node returns it - tx hash & target indexed, the rest abi encoded in data'''
+    tx_hash = timelock_tx_hash(TARGET, value, signature, data, eta)
+    return {
+        'topics': [topic, tx_hash, '0x' + '00' * 12 + TARGET[2:]],
+        'data': '0x' + abi_encode(['uint256', 'string', 'bytes', 'uint256'], [value, signature, data, eta]).hex(),
+    }
+
+@pytest.mark.parametrize('signature, data', ACTIONS)
+def test_decode_timelock_event(signature, data):
+    log = timelock_log(QUEUE_TOPIC, signature, data, 1_700_000_000, value=5)
+    assert decode_timelock_event(log) == (log['topics'][1], TARGET, 5, signature, data, 1_700_000_000), "event decoded wrong"
+
+def test_status_boundaries():
+    '''queued before eta, executable from eta to eta + GRACE_PERIOD inclusive (Timelock.sol), expired after'''
+    eta = 1_700_000_000
+    index = QueueIndex()
+    index.add_proposal(1, eta, ([TARGET], [0], ['setPendingAdmin(address)'], [b'']))
+    action = next(iter(index.actions.values()))
+    assert index.status(action, eta) == 'not queued', "proposal action without a QueueTransaction"
+
+    index.apply_log(timelock_log(QUEUE_TOPIC, 'setPendingAdmin(address)', b'', eta))
+    assert len(index.actions) == 1, "QueueTransaction not matched to the proposal action"
+    assert action['proposal_id'] == 1, "proposal id lost"
+    expected = [(eta - 1, 'queued'), (eta, 'executable'), (eta + GRACE_PERIOD, 'executable'), (eta + GRACE_PERIOD + 1, 'expired')]
+    for now, status in expected:
+        assert index.status(action, now) == status, f"wrong status at eta{now - eta:+}"
+
+    index.apply_log(timelock_log(EXECUTE_TOPIC, 'setPendingAdmin(address)', b'', eta))
+    assert index.status(action, eta + GRACE_PERIOD + 1) == 'executed', "execution not recorded"
+
+def test_cancelled():
+    eta = 1_700_000_000
+    index = QueueIndex()
+    index.apply_log(timelock_log(QUEUE_TOPIC, 'transfer(address,uint256)', b'\x01', eta))
+    index.apply_log(timelock_log(CANCEL_TOPIC, 'transfer(address,uint256)', b'\x01', eta))
+    assert [index.status(action, eta) for action in index.actions.values()] == ['cancelled'], "cancel not recorded"
@@ -0,0 +1,153 @@
+import pytest
+from scripts.tx_scheduler import TxScheduler, Step, StepFailed, dependency_waves, deployed
+
+class FakeReceipt:
+    def __init__(self, txid, nonce):
+        self.txid = txid
+        self.sender = '0x0000000000000000000000000000000000000001'
+        self.nonce = nonce
+        self.contract_address = None # brownie sets this from its confirmation thread, often after we see the tx mined
+
+class FakeChain:
+    '''
+        minimal stand-in for web3: one block per poll, every pending tx is mined on the next block
+        unless <hold> says how many more blocks to keep it in the mempool
+    '''
+    def __init__(self, hold=0):
+        self.eth = self
+        self.block = 0
+        self.hold = hold
+        self.mempool = {} # nonce -> (receipt, mine at block)
+        self.mined = {} # txid -> receipt dict
+        self.mined_nonces = 0
+        self.sent = 0
+
+    def send(self, results, tx):
+        nonce = tx.get('nonce', self.mined_nonces + len(self.mempool))
+        self.sent += 1
+        receipt = FakeReceipt(f'0x{self.sent:064x}', nonce)
+        mine_at = self.block + 1 + self.hold
+        if nonce in self.mempool: # a replacement doesn't wait longer than the tx it replaces
+            mine_at = min(mine_at, self.mempool[nonce][1])
+        self.mempool[nonce] = (receipt, mine_at)
+        return receipt
+
+    @property
+    def block_number(self):
+        self.block += 1
+        for nonce, (receipt, mine_at) in list(self.mempool.items()):
+            if self.block >= mine_at:
+                self.mined[receipt.txid] = {'status': 1, 'blockNumber': self.block, 'transactionHash': bytes.fromhex(receipt.txid[2:]),
+                    'contractAddress': '0x' + receipt.txid[-40:]}
+                self.mined_nonces += 1
+                del self.mempool[nonce]
+        return self.block
+
+    def get_transaction_receipt(self, txid):
+        return self.mined.get(txid)
+
+    def get_transaction_count(self, sender):
+        return self.mined_nonces
+
+    def get_transaction(self, txid):
+        return {}
+
+def test_dependency_waves():
+    steps = [Step('a', None), Step('b', None, deps=['a']), Step('c', None), Step('d', None, deps=['b', 'c'])]
+    assert [[step.name for step in wave] for wave in dependency_waves(steps)] == [['a', 'c'], ['b'], ['d']], "wrong waves"
+    with pytest.raises(ValueError):
+        dependency_waves([Step('a', None, deps=['b']), Step('b', None, deps=['a'])])
+
+def test_resolve_failure_is_step_failed():
+    '''e.g. an Etherscan error while publishing source must stop the run cleanly, not as a raw traceback'''
+    chain = FakeChain()
+    def resolve(results, receipt):
+        raise ConnectionError('etherscan unavailable')
+    scheduler = TxScheduler(chain, poll_interval=0)
+    scheduler.add(Step('GTC', chain.send, resolve=resolve))
+    with pytest.raises(StepFailed, match='GTC'):
+        scheduler.run()
+
+class FakeContainer:
+    def at(self, address):
+        if address is None:
+            raise ValueError('not a contract address: None')
+        return ('contract', address)
+
+def test_deploy_resolves_from_mined_receipt():
+    '''the pending brownie receipt may not have contract_address yet when the scheduler sees the deploy confirmed'''
+    chain = FakeChain()
+    scheduler = TxScheduler(chain, poll_interval=0)
+    scheduler.add(Step('GTC', chain.send, resolve=deployed(FakeContainer())))
+    scheduler.add(Step('setMinter', chain.send, deps=['GTC']))
+    results = scheduler.run()
+    assert results['GTC'] == ('contract', '0x' + f'{1:064x}'[-40:]), "contract not built from the mined receipt"
+    assert isinstance(results['setMinter'], FakeReceipt), "steps without resolve should keep the brownie receipt"
+
+class DoubleFees:
+    '''fee engine stand-in: flat estimate, every bump doubles both fees'''
+    target_blocks = 1
+
+    def estimate(self):
+        return {'max_fee': 100, 'priority_fee': 1}
+
+    def bump(self, fees):
+        return {'max_fee': fees['max_fee'] * 2, 'priority_fee': fees['priority_fee'] * 2}
+
+@pytest.mark.parametrize('error', ['nonce too low', 'replacement transaction underpriced'])
+def test_refused_replacement_does_not_abort(error):
+    '''a fee bump the node refuses is logged and the step checked again on the next poll, other steps carry on'''
+    chain = FakeChain(hold=3)
+    replacements = []
+    def send(results, tx):
+        if 'nonce' in tx:
+            replacements.append(tx)
+            if len(replacements) == 1:
+                raise ValueError(error)
+        return chain.send(results, tx)
+    scheduler = TxScheduler(chain, poll_interval=0, fee_engine=DoubleFees(), stuck_blocks=1)
+    scheduler.add(Step('payout', send))
+    scheduler.add(Step('other', chain.send))
+
+    results = scheduler.run()
+
+    assert set(results) == {'payout', 'other'}, "run aborted on a refused replacement"
+    assert len(replacements) > 1, "refused replacement was never retried"
+
+def test_refused_bump_waits_stuck_blocks():
+    '''a refused fee bump is retried after another <stuck_blocks>, not on every poll'''
+    chain = FakeChain(hold=12)
+    attempts = []
+    def send(results, tx):
+        if 'nonce' in tx:
+            attempts.append(chain.block)
+            raise ValueError('replacement transaction underpriced')
+        return chain.send(results, tx)
+    scheduler = TxScheduler(chain, poll_interval=0, fee_engine=DoubleFees(), stuck_blocks=3)
+    scheduler.add(Step('payout', send))
+
+    scheduler.run()
+
+    assert len(attempts) > 1, "refused bump never retried"
+    assert all(b - a >= 3 for a, b in zip(attempts, attempts[1:])), f"bumps retried too soon: blocks {attempts}"
+
+class ForgetfulChain(FakeChain):
+    '''node that no longer knows any pending tx, so every poll looks like a drop'''
+    def get_transaction(self, txid):
+        raise ValueError('transaction not found')
+
+def test_one_send_per_nonce_per_poll():
+    '''a tx re-broadcast as dropped isn't also bumped as stuck in the same poll'''
+    chain = ForgetfulChain(hold=4)
+    sends = []
+    def send(results, tx):
+        sends.append((chain.block, tx.get('nonce')))
+        return chain.send(results, tx)
+    scheduler = TxScheduler(chain, poll_interval=0, drop_timeout=0, max_rebroadcasts=10, fee_engine=DoubleFees(), stuck_blocks=1)
+    scheduler.add(Step('payout', send))
+
+    scheduler.run()
+
+    resends = [block for block, nonce in sends if nonce is not None]
+    assert resends, "dropped tx never re-sent"
+    assert len(resends) == len(set(resends)), f"same nonce sent twice in one poll: blocks {resends}"